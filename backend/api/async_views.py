@@ -0,0 +1,205 @@
+import math
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponseNotAllowed, JsonResponse
+from rest_framework import exceptions
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from foodgram import settings
+from ingredients.models import Ingredient
+from ingredients.search import autocomplete
+from recipes.models import Recipe, Tag
+from .authentication import CachedTokenAuthentication
+from .executors import run_blocking
+from .filters import filter_recipes
+from .payloads import (ingredient_payload, payload_response,
+                       recipe_page_key, tag_payload)
+from .serializers import RecipeSerializer, RecipeSnapshotSerializer
+from .throttling import consume, request_ident
+from .utils import (SHOPPING_CART_TEMPLATE, render_to_pdf,
+                    shopping_cart_context)
+from .views import MESSAGES, RecipeViewSet
+
+
+INVALID_PAGE = 'Неправильная страница.'
+
+
+def throttled_response(wait):
+    exc = exceptions.Throttled(wait)
+    response = JsonResponse({'detail': exc.detail}, status=exc.status_code)
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+async def authenticate(request):
+    """Аутентификация по токену для асинхронных представлений."""
+
+    result = await sync_to_async(
+        CachedTokenAuthentication().authenticate
+    )(request)
+    request.user = result[0] if result else AnonymousUser()
+    return request.user
+
+
+def async_get(fallback=None, throttle_scope=None):
+    """Асинхронная обработка GET с аутентификацией по токену, как в DRF.
+    Остальные методы передаются синхронному представлению fallback.
+    Ограничение throttle_scope (область или функция запроса, которая ее
+    возвращает) проверяется до аутентификации."""
+
+    def decorator(view):
+        async def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                if fallback is None:
+                    return HttpResponseNotAllowed(['GET'])
+                return await sync_to_async(fallback)(request, *args, **kwargs)
+            scope = (
+                throttle_scope(request) if callable(throttle_scope)
+                else throttle_scope
+            )
+            if scope is not None:
+                wait = await sync_to_async(
+                    lambda: consume(scope, request_ident(request))
+                )()
+                if wait is not None:
+                    return throttled_response(wait)
+            try:
+                await authenticate(request)
+            except exceptions.AuthenticationFailed as exc:
+                return JsonResponse({'detail': exc.detail}, status=401)
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@async_get()
+async def tag_list(request):
+    """Асинхронный список тегов."""
+
+    response = await sync_to_async(payload_response)(request, tag_payload)
+    if response is not None:
+        return response
+    tags = [
+        tag async for tag in Tag.objects.values(
+            'id', 'name', 'color', 'slug'
+        )
+    ]
+    return JsonResponse(tags, safe=False)
+
+
+@async_get(throttle_scope='search')
+async def ingredient_list(request):
+    """Асинхронный список ингредиентов с автодополнением по ?name=,
+    как в IngredientViewSet.list."""
+
+    if 'name' in request.GET:
+        ingredients = await sync_to_async(autocomplete)(
+            Ingredient.objects.all(),
+            request.GET['name'],
+            settings.INGREDIENT_AUTOCOMPLETE_LIMIT,
+            settings.INGREDIENT_MIN_PREFIX,
+            compact=request.GET.get('compact') == 'true',
+        )
+        return JsonResponse(ingredients, safe=False)
+    response = await sync_to_async(payload_response)(
+        request, ingredient_payload
+    )
+    if response is not None:
+        return response
+    ingredients = [
+        ingredient async for ingredient in Ingredient.objects.values(
+            'id', 'name', 'measurement_unit'
+        )
+    ]
+    return JsonResponse(ingredients, safe=False)
+
+
+def recipe_list_scope(request):
+    """Поиск ограничивается как в RecipeViewSet.get_throttles."""
+
+    return 'search' if request.GET.get('search') else None
+
+
+@async_get(
+    fallback=RecipeViewSet.as_view({'post': 'create'}),
+    throttle_scope=recipe_list_scope,
+)
+async def recipe_list(request):
+    """Асинхронный список рецептов.
+    Формат ответа совпадает с CustomPagination, кэш страниц общий
+    с RecipeViewSet.list."""
+
+    key = None
+    if settings.RECIPE_PAGE_CACHE_TIMEOUT and settings.SHARED_CACHE:
+        key = await sync_to_async(recipe_page_key)(request, request.user)
+    if key is not None:
+        data = await cache.aget(key)
+        if data is not None:
+            return JsonResponse(data)
+    if settings.RECIPE_SNAPSHOTS:
+        queryset = Recipe.objects.only('id', 'snapshot')
+        serializer_class = RecipeSnapshotSerializer
+    else:
+        queryset = Recipe.objects.select_related('author').prefetch_related(
+            'tags', 'recipe_ingredients__ingredient'
+        )
+        serializer_class = RecipeSerializer
+    queryset = filter_recipes(queryset, request.GET, request.user)
+    try:
+        page = int(request.GET.get('page', 1))
+        limit = int(request.GET.get('limit', settings.REST_FRAMEWORK[
+            'PAGE_SIZE'
+        ]))
+    except ValueError:
+        page = limit = 0
+    if page < 1 or limit < 1:
+        return JsonResponse({'detail': INVALID_PAGE}, status=404)
+
+    count = await queryset.acount()
+    offset = (page - 1) * limit
+    if offset and offset >= count:
+        return JsonResponse({'detail': INVALID_PAGE}, status=404)
+    recipes = [recipe async for recipe in queryset[offset:offset + limit]]
+
+    url = request.build_absolute_uri()
+    next_url = None
+    if offset + limit < count:
+        next_url = replace_query_param(url, 'page', page + 1)
+    previous_url = None
+    if page == 2:
+        previous_url = remove_query_param(url, 'page')
+    elif page > 2:
+        previous_url = replace_query_param(url, 'page', page - 1)
+
+    results = await sync_to_async(
+        lambda: serializer_class(
+            recipes, many=True, context={'request': request}
+        ).data
+    )()
+    data = {
+        'count': count,
+        'next': next_url,
+        'previous': previous_url,
+        'results': results,
+    }
+    if key is not None:
+        await cache.aset(key, data, settings.RECIPE_PAGE_CACHE_TIMEOUT)
+    return JsonResponse(data)
+
+
+@async_get(throttle_scope='pdf')
+async def download_shopping_cart(request):
+    """Асинхронная выгрузка списка покупок.
+    Рендер PDF выполняется в ограниченном пуле потоков."""
+
+    if not request.user.is_authenticated:
+        return JsonResponse(
+            {'detail': exceptions.NotAuthenticated.default_detail},
+            status=401,
+        )
+    context = await sync_to_async(shopping_cart_context)(
+        request.user, MESSAGES['pdf_about']
+    )
+    return await run_blocking(render_to_pdf)(SHOPPING_CART_TEMPLATE, context)
@@ -0,0 +1,82 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+
+from foodgram import settings
+from .throttling import remember_token
+
+REVOKED_KEY = 'auth-revoked:{}'
+
+
+class TokenCache:
+    """LRU-кэш токен -> (пользователь, токен) с ограничением времени жизни.
+    Отзыв для пользователя отмечается в общем кэше Django, поэтому
+    остальные воркеры перестают доверять своим записям сразу, а не
+    по истечении TTL."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, token, cached_at = entry
+            if time.time() - cached_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        revoked_at = cache.get(REVOKED_KEY.format(user.pk))
+        if revoked_at is not None and revoked_at >= cached_at:
+            self.discard(key)
+            return None
+        return user, token
+
+    def set(self, key, user, token):
+        with self._lock:
+            self._entries[key] = (user, token, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def revoke_user(self, user_id):
+        cache.set(REVOKED_KEY.format(user_id), time.time(), self.ttl)
+        with self._lock:
+            for key in [
+                key for key, (user, _, _) in self._entries.items()
+                if user.pk == user_id
+            ]:
+                del self._entries[key]
+
+
+token_cache = TokenCache(
+    settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_CACHE_TTL
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса Token + User на каждый запрос.
+    Каждый запрос получает собственную копию закэшированного
+    пользователя."""
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, token)
+            remember_token(key)
+        else:
+            user, token = cached
+        return copy.copy(user), token
@@ -0,0 +1,44 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import check_password, make_password
+
+from foodgram import settings
+
+BLOCKING_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.BLOCKING_POOL_SIZE,
+    thread_name_prefix='blocking',
+)
+
+# Ограничение числа одновременных хэширований паролей в процессе.
+# Хэширование (PBKDF2, Argon2) отпускает GIL и выполняется в потоке
+# запроса, который ждет свободного слота: это не разгружает поток,
+# а только не дает регистрациям занять все ядра.
+HASHING_SLOTS = threading.BoundedSemaphore(
+    settings.PASSWORD_HASHING_THREADS
+)
+
+
+def run_blocking(func):
+    """Обертка для тяжелой синхронной работы (PDF, изображения).
+    Выполняется в ограниченном пуле, не занимая event loop."""
+
+    return sync_to_async(
+        func, thread_sensitive=False, executor=BLOCKING_EXECUTOR
+    )
+
+
+def hash_password(raw_password):
+    """make_password, не больше PASSWORD_HASHING_THREADS одновременно.
+    Блокирует поток запроса на время ожидания и хэширования."""
+
+    with HASHING_SLOTS:
+        return make_password(raw_password)
+
+
+def verify_password(raw_password, encoded):
+    """check_password с тем же ограничением, что и hash_password."""
+
+    with HASHING_SLOTS:
+        return check_password(raw_password, encoded)
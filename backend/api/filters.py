@@ -1,7 +1,44 @@
 from rest_framework.filters import SearchFilter
 
+from recipes.rankings import ORDERINGS
+from recipes.search import search_recipes
+
 
 class IngredientSearchFilter(SearchFilter):
     """Фильтр для Ингредиентов"""
 
     search_param = 'name'
+
+
+def filter_recipes(queryset, params, user):
+    """Фильтрация рецептов по параметрам запроса.
+    Общая для синхронного и асинхронного представлений."""
+
+    tag_list = params.getlist('tags')
+    if tag_list:
+        queryset = queryset.filter(tags__slug__in=tag_list).distinct()
+
+    author = params.get('author')
+    if author:
+        queryset = queryset.filter(author__id=author)
+
+    search = params.get('search')
+    if search:
+        queryset = search_recipes(queryset, search)
+
+    ordering = params.get('ordering')
+    if ordering in ORDERINGS:
+        queryset = queryset.order_by(*ORDERINGS[ordering])
+
+    if not user.is_authenticated:
+        return queryset
+
+    is_in_shopping_cart = params.get('is_in_shopping_cart')
+    if is_in_shopping_cart:
+        queryset = queryset.filter(shopping_card=user)
+
+    is_favorited = params.get('is_favorited')
+    if is_favorited:
+        queryset = queryset.filter(favorite=user)
+
+    return queryset
@@ -0,0 +1,49 @@
+import io
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiling import collapsed_stacks, cprofile_stats, profile_files
+
+
+class Command(BaseCommand):
+    help = 'Сводка профилей запросов из PROFILING_DIR.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help='По умолчанию PROFILING_DIR.')
+        parser.add_argument('--match', default='*',
+                            help='Шаблон имени файла, например *recipes*.')
+        parser.add_argument('--top', type=int, default=30)
+        parser.add_argument('--sort', default='cumulative',
+                            help='Ключ сортировки pstats.')
+        parser.add_argument('--collapsed',
+                            help='Файл для сложенных стеков (flamegraph.pl).')
+
+    def handle(self, *args, **options):
+        paths = profile_files(options['dir'], options['match'])
+        if not paths:
+            raise CommandError('No profiles found.')
+
+        output = io.StringIO()
+        stats = cprofile_stats(paths, stream=output)
+        if stats is not None:
+            stats.sort_stats(options['sort']).print_stats(options['top'])
+            self.stdout.write(output.getvalue())
+
+        stacks = collapsed_stacks(paths)
+        if not stacks:
+            return
+        total = sum(stacks.values())
+        leaves = {}
+        for stack, count in stacks.items():
+            leaf = stack.rsplit(';', 1)[-1]
+            leaves[leaf] = leaves.get(leaf, 0) + count
+        self.stdout.write(f'Samples: {total}')
+        for leaf, count in sorted(
+            leaves.items(), key=lambda item: -item[1]
+        )[:options['top']]:
+            self.stdout.write(f'{count / total:7.1%}  {leaf}')
+        if options['collapsed']:
+            with open(options['collapsed'], 'w', encoding='utf-8') as result:
+                for stack, count in stacks.most_common():
+                    result.write(f'{stack} {count}\n')
+            self.stdout.write(f"Collapsed stacks: {options['collapsed']}")
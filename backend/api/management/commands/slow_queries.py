@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from api.querylog import read_entries, summarize
+
+
+class Command(BaseCommand):
+    help = 'Сводка журнала медленных запросов по отпечаткам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='По умолчанию SLOW_QUERY_LOG_FILE.')
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--plans', action='store_true',
+                            help='Вывести планы EXPLAIN.')
+
+    def handle(self, *args, **options):
+        summary = summarize(read_entries(options['file']))
+        if not summary:
+            self.stdout.write('No slow queries logged.')
+            return
+        for group in summary[:options['top']]:
+            self.stdout.write(
+                f"{group['fingerprint']} count={group['count']} "
+                f"total={group['total_ms']:.1f}ms "
+                f"p95={group['p95_ms']:.1f}ms max={group['max_ms']:.1f}ms"
+            )
+            for field in ('views', 'serializers', 'sources'):
+                if group[field]:
+                    self.stdout.write(
+                        f"  {field}: {', '.join(sorted(group[field]))}"
+                    )
+            self.stdout.write(f"  sql: {group['sql'] or '-'}")
+            if options['plans'] and group['plan']:
+                for line in group['plan'].splitlines():
+                    self.stdout.write(f'    {line}')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from api.warmup import warm_caches
+from foodgram import settings
+
+
+class Command(BaseCommand):
+    help = ('Прогрев после деплоя: готовые ответы тегов и ингредиентов, '
+            'индексы БД и первые страницы рецептов по частым тегам. '
+            'Кэши ответов заполняются только в общем кэше '
+            '(CACHE_BACKEND redis или memcached).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url',
+                            help='Адрес сайта, по умолчанию '
+                                 'WARM_CACHE_BASE_URL.')
+        parser.add_argument('--no-pages', action='store_true',
+                            help='Не заполнять кэш страниц рецептов.')
+
+    def handle(self, *args, **options):
+        if not settings.SHARED_CACHE:
+            self.stderr.write(
+                'CACHE_BACKEND is process-local: only database indexes '
+                'are warmed. Use a shared cache to warm response caches.'
+            )
+        for name, seconds, result in warm_caches(
+            options['base_url'], prime_pages=not options['no_pages']
+        ):
+            self.stdout.write(f'{name}: {seconds:.3f}s ({result})')
@@ -0,0 +1,111 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.core.cache import cache
+from django.db import connections
+from rest_framework import permissions
+
+from foodgram import settings
+from foodgram.db_router import primary_written, use_primary
+from . import profiling
+from .querylog import SlowQueryLogger, current_view
+from .throttling import token_digest
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaStickinessMiddleware:
+    """Привязка запросов к основной БД при записи.
+    Небезопасные методы идут на default. После записи пользователь
+    REPLICA_STICKY_SECONDS читает с default, пока реплики догоняют."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    @staticmethod
+    def sticky_key(request):
+        digest = token_digest(request)
+        if digest is None:
+            return None
+        return 'db-sticky:' + digest
+
+    def __call__(self, request):
+        key = self.sticky_key(request)
+        pinned = (
+            request.method not in permissions.SAFE_METHODS
+            or (key is not None and cache.get(key) is not None)
+        )
+        pinned_token = use_primary.set(pinned)
+        written_token = primary_written.set(False)
+        try:
+            response = self.get_response(request)
+            if key is not None and primary_written.get():
+                cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+        finally:
+            use_primary.reset(pinned_token)
+            primary_written.reset(written_token)
+        return response
+
+
+class SlowQueryLogMiddleware:
+    """Журнал медленных запросов к БД (api.querylog.SlowQueryLogger).
+    Подключается только при SLOW_QUERY_LOG=True."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.query_logger = SlowQueryLogger()
+
+    def __call__(self, request):
+        token = current_view.set(None)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(self.query_logger)
+                    )
+                return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'cls', None)
+        name = (
+            view.__name__ if view is not None
+            else getattr(view_func, '__qualname__', repr(view_func))
+        )
+        actions = getattr(view_func, 'actions', None)
+        if actions and request.method.lower() in actions:
+            name = f'{name}.{actions[request.method.lower()]}'
+        current_view.set(f'{request.method} {name}')
+
+
+class ProfilingMiddleware:
+    """Профилирование отдельных запросов (api.profiling): по заголовку
+    X-Profile или ?profile= от персонала и каждый PROFILING_SAMPLE_RATE
+    запрос. Подключается только при PROFILING=True."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = requested = profiling.requested_mode(request)
+        if mode is None and profiling.sampled():
+            mode = settings.PROFILING_SAMPLE_MODE
+        if mode is None:
+            return self.get_response(request)
+        started = time.perf_counter()
+        profiler = profiling.start(mode)
+        try:
+            response = self.get_response(request)
+        finally:
+            name = profiling.stop(
+                profiler, request, time.perf_counter() - started
+            )
+        # Имя файла видит только запросивший профиль сотрудник,
+        # выборочные профили клиенту не раскрываются.
+        if requested:
+            response['X-Profile-File'] = name
+        else:
+            logger.info('Sampled profile %s', name)
+        return response
@@ -1,6 +1,42 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class CustomPagination(PageNumberPagination):
 
     page_size_query_param = 'limit'
+
+
+class FeedPagination(CursorPagination):
+    """Keyset-пагинация ленты по (pub_date, id)."""
+
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'limit'
+
+    def paginate_cached(self, items, request):
+        """Первая страница из готового списка объектов (кэш ленты).
+        Список должен содержать page_size + 1 элементов, если есть
+        следующая страница, как в CursorPagination.paginate_queryset."""
+
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, None, None)
+        self.cursor = None
+        self.page = list(items[:self.page_size])
+        self.has_next = len(items) > self.page_size
+        self.has_previous = False
+        if self.has_next:
+            self.next_position = self._get_position_from_instance(
+                items[self.page_size], self.ordering
+            )
+        return self.page
+
+    def is_first_page(self, request):
+        return not request.query_params.get(self.cursor_query_param)
+
+
+class DirectoryPagination(CursorPagination):
+    """Keyset-пагинация справочника пользователей по username."""
+
+    ordering = ('username',)
+    page_size_query_param = 'limit'
+    max_page_size = 100
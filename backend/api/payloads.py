@@ -0,0 +1,138 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from foodgram import settings
+from ingredients.models import Ingredient
+from recipes.models import Tag
+
+PAYLOAD_KEY = 'payload:{}:{}'
+PAYLOAD_VERSION_KEY = 'payload:{}:version'
+RECIPE_PAGE_KEY = 'recipe-page:{}:{}'
+RECIPE_PAGE_VERSION_KEY = 'recipe-page:version'
+RECIPE_PAGE_PARAMS = {'tags', 'page', 'limit'}
+
+
+def cache_version(key):
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(key):
+    cache.set(key, time.time_ns(), None)
+
+
+def render_json(data):
+    """JSON как у JSONRenderer DRF: компактно и без экранирования
+    не-ASCII символов."""
+
+    return json.dumps(
+        data, ensure_ascii=False, separators=(',', ':')
+    ).encode()
+
+
+class ReferencePayload:
+    """Готовый ответ со всем справочником (теги, ингредиенты) в gzip.
+    Собирается один раз на версию и хранится в общем кэше Django и
+    в памяти процесса вместе с распакованной копией. Версия читается
+    из общего кэша на каждый запрос, поэтому используется только при
+    SHARED_CACHE: в LocMemCache сброс виден лишь одному воркеру."""
+
+    def __init__(self, name, queryset, fields):
+        self.name = name
+        self.queryset = queryset
+        self.fields = fields
+        self._lock = threading.Lock()
+        self._local = None
+
+    def build(self):
+        return gzip.compress(
+            render_json(list(self.queryset.all().values(*self.fields)))
+        )
+
+    def get(self):
+        """(gzip, json) текущей версии справочника."""
+
+        version = cache_version(PAYLOAD_VERSION_KEY.format(self.name))
+        local = self._local
+        if local is not None and local[0] == version:
+            return local[1:]
+        key = PAYLOAD_KEY.format(self.name, version)
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = self.build()
+            cache.set(key, compressed, settings.REFERENCE_CACHE_TIMEOUT)
+        with self._lock:
+            self._local = (version, compressed, gzip.decompress(compressed))
+            return self._local[1:]
+
+    def invalidate(self):
+        bump_version(PAYLOAD_VERSION_KEY.format(self.name))
+        with self._lock:
+            self._local = None
+
+
+tag_payload = ReferencePayload(
+    'tags', Tag.objects.all(), ('id', 'name', 'color', 'slug')
+)
+ingredient_payload = ReferencePayload(
+    'ingredients', Ingredient.objects.all(),
+    ('id', 'name', 'measurement_unit'),
+)
+
+
+def payload_response(request, payload):
+    """Ответ из готового справочника: сжатый, если клиент принимает gzip.
+    None без общего кэша - представление отвечает как обычно."""
+
+    if not settings.SHARED_CACHE:
+        return None
+    compressed, body = payload.get()
+    if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+        response = HttpResponse(compressed, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def recipe_page_key(request, user):
+    """Ключ кэша страницы списка рецептов или None, если ответ не
+    кэшируется: кэш выключен или не общий, пользователь аутентифицирован
+    (флаги избранного и корзины) или есть фильтры кроме тегов."""
+
+    if (
+        not settings.RECIPE_PAGE_CACHE_TIMEOUT
+        or not settings.SHARED_CACHE
+        or user.is_authenticated
+    ):
+        return None
+    params = request.GET
+    if set(params) - RECIPE_PAGE_PARAMS:
+        return None
+    variant = '|'.join((
+        # Ссылки на страницы и изображения абсолютные.
+        request.build_absolute_uri('/'),
+        ','.join(sorted(set(params.getlist('tags')))),
+        params.get('page', '1'),
+        params.get('limit', str(settings.REST_FRAMEWORK['PAGE_SIZE'])),
+    ))
+    return RECIPE_PAGE_KEY.format(
+        cache_version(RECIPE_PAGE_VERSION_KEY),
+        hashlib.sha1(variant.encode()).hexdigest(),
+    )
+
+
+def invalidate_recipe_pages():
+    bump_version(RECIPE_PAGE_VERSION_KEY)
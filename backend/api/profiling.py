@@ -0,0 +1,141 @@
+import cProfile
+import glob
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from rest_framework.exceptions import AuthenticationFailed
+
+from foodgram import settings
+from .authentication import CachedTokenAuthentication
+
+MODES = ('cprofile', 'stack')
+HEADER = 'HTTP_X_PROFILE'
+SLUG = re.compile(r'[^a-z0-9]+')
+
+
+def requested_mode(request):
+    """Режим профилирования из заголовка X-Profile или ?profile=,
+    только для персонала. 1 и true - cprofile."""
+
+    mode = request.META.get(HEADER) or request.GET.get('profile')
+    if not mode:
+        return None
+    mode = 'cprofile' if mode.lower() in ('1', 'true') else mode.lower()
+    if mode not in MODES or not is_staff(request):
+        return None
+    return mode
+
+
+def is_staff(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+    try:
+        authenticated = CachedTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return authenticated is not None and authenticated[0].is_staff
+
+
+def sampled():
+    rate = settings.PROFILING_SAMPLE_RATE
+    return rate > 0 and random.randrange(rate) == 0
+
+
+def frame_name(code):
+    path = os.path.relpath(code.co_filename, settings.BASE_DIR)
+    if path.startswith('..'):
+        path = code.co_filename.rsplit('site-packages' + os.sep, 1)[-1]
+    return f'{code.co_name} ({path}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    """Сэмплирующий профилировщик потока запроса: каждые
+    PROFILING_INTERVAL_MS снимает стек и считает повторы. Результат -
+    свернутые стеки 'кадр;кадр;... число', как у py-spy --format raw,
+    вход для flamegraph.pl и speedscope."""
+
+    def __init__(self, interval=None):
+        self.interval = (interval or settings.PROFILING_INTERVAL_MS) / 1000
+        self.stacks = Counter()
+        self.thread_id = threading.get_ident()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def enable(self):
+        self.thread.start()
+
+    def disable(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(frame_name(frame.f_code))
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def dump_stats(self, path):
+        with open(path, 'w', encoding='utf-8') as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f'{stack} {count}\n')
+
+
+def start(mode):
+    profiler = cProfile.Profile() if mode == 'cprofile' else StackSampler()
+    profiler.enable()
+    return profiler
+
+
+def stop(profiler, request, elapsed):
+    """Сохраняет профиль в PROFILING_DIR, возвращает имя файла."""
+
+    profiler.disable()
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    slug = SLUG.sub('-', request.path.lower()).strip('-') or 'root'
+    extension = 'prof' if isinstance(profiler, cProfile.Profile) else 'txt'
+    name = (
+        f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-'
+        f'{request.method.lower()}-{slug}-{elapsed * 1000:.0f}ms.{extension}'
+    )
+    profiler.dump_stats(os.path.join(settings.PROFILING_DIR, name))
+    return name
+
+
+def profile_files(directory=None, pattern='*'):
+    directory = directory or settings.PROFILING_DIR
+    return sorted(glob.glob(os.path.join(directory, pattern)))
+
+
+def collapsed_stacks(paths):
+    """Свернутые стеки всех файлов .txt, сложенные по стеку."""
+
+    stacks = Counter()
+    for path in paths:
+        if not path.endswith('.txt'):
+            continue
+        with open(path, encoding='utf-8') as profile:
+            for line in profile:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if stack and count.isdigit():
+                    stacks[stack] += int(count)
+    return stacks
+
+
+def cprofile_stats(paths, stream=None):
+    """Объединенная статистика всех файлов .prof или None."""
+
+    paths = [path for path in paths if path.endswith('.prof')]
+    if not paths:
+        return None
+    return pstats.Stats(*paths, stream=stream)
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+from django.utils import timezone
+from rest_framework.serializers import BaseSerializer
+
+from foodgram import settings
+
+# Представление текущего запроса, заполняет SlowQueryLogMiddleware.
+current_view = ContextVar('current_view', default=None)
+# Запрос EXPLAIN выполняется через тот же execute_wrapper.
+explaining = ContextVar('explaining', default=False)
+
+LITERALS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+logger = logging.getLogger('foodgram.slow_queries')
+logger.propagate = False
+
+
+def fingerprint(sql):
+    """Текст запроса без литералов и параметров и его хэш.
+    Списки IN (%s, %s, ...) любой длины сводятся к одному виду."""
+
+    normalized = sql
+    for pattern, replacement in LITERALS:
+        normalized = pattern.sub(replacement, normalized)
+    normalized = normalized.strip()
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16], normalized
+
+
+def origin():
+    """Сериализатор и первая строка кода проекта в стеке вызова."""
+
+    serializer = source = None
+    frame = sys._getframe(2)
+    while frame is not None and (serializer is None or source is None):
+        code = frame.f_code
+        if serializer is None and isinstance(
+            frame.f_locals.get('self'), BaseSerializer
+        ):
+            serializer = type(frame.f_locals['self']).__name__
+        if (
+            source is None
+            and code.co_filename.startswith(settings.BASE_DIR)
+            and 'site-packages' not in code.co_filename
+            and not code.co_filename.startswith(__file__[:-3])
+        ):
+            path = os.path.relpath(code.co_filename, settings.BASE_DIR)
+            source = f'{path}:{frame.f_lineno} {code.co_name}'
+        frame = frame.f_back
+    return serializer, source
+
+
+def setup_logger():
+    if logger.handlers:
+        return
+    directory = os.path.dirname(settings.SLOW_QUERY_LOG_FILE)
+    os.makedirs(directory, exist_ok=True)
+    handler = RotatingFileHandler(
+        settings.SLOW_QUERY_LOG_FILE,
+        maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+        backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+        encoding='utf-8',
+        delay=True,
+    )
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+class SlowQueryLogger:
+    """execute_wrapper: запросы дольше SLOW_QUERY_MS пишутся в
+    SLOW_QUERY_LOG_FILE строками JSON. Полный текст и план EXPLAIN
+    сохраняются только для первого запроса с данным отпечатком
+    (из последних SLOW_QUERY_FINGERPRINTS), остальные записи содержат
+    только отпечаток, время и место вызова."""
+
+    def __init__(self, threshold_ms=None, explain=None, remember=None):
+        self.threshold = (
+            threshold_ms if threshold_ms is not None
+            else settings.SLOW_QUERY_MS
+        ) / 1000
+        self.explain = (
+            settings.SLOW_QUERY_EXPLAIN if explain is None else explain
+        )
+        self.remember = remember or settings.SLOW_QUERY_FINGERPRINTS
+        self.seen = OrderedDict()
+        self.lock = threading.Lock()
+        setup_logger()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = execute(sql, params, many, context)
+            failed = False
+            return result
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= self.threshold and not explaining.get():
+                self.record(sql, params, many, context, duration, failed)
+
+    def is_new(self, key):
+        with self.lock:
+            if key in self.seen:
+                self.seen.move_to_end(key)
+                return False
+            self.seen[key] = True
+            if len(self.seen) > self.remember:
+                self.seen.popitem(last=False)
+            return True
+
+    def record(self, sql, params, many, context, duration, failed=False):
+        key, normalized = fingerprint(sql)
+        serializer, source = origin()
+        connection = context['connection']
+        entry = {
+            'time': timezone.now().isoformat(),
+            'fingerprint': key,
+            'ms': round(duration * 1000, 2),
+            'db': connection.alias,
+            'view': current_view.get(),
+            'serializer': serializer,
+            'source': source,
+        }
+        if failed:
+            entry['failed'] = True
+        if self.is_new(key):
+            entry['sql'] = normalized
+            # После ошибки транзакция PostgreSQL прервана, план не получить.
+            if self.explain and not many and not failed:
+                entry['plan'] = self.explain_plan(connection, sql, params)
+        logger.info(json.dumps(entry, ensure_ascii=False))
+
+    @staticmethod
+    def explain_plan(connection, sql, params):
+        if sql.lstrip()[:6].upper() != 'SELECT':
+            return None
+        token = explaining.set(True)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'{connection.ops.explain_query_prefix()} {sql}', params
+                )
+                return '\n'.join(
+                    ' '.join(str(value) for value in row)
+                    for row in cursor.fetchall()
+                )
+        except Exception as error:
+            # Запрос уже выполнен, план не должен ломать ответ.
+            return f'EXPLAIN failed: {error}'
+        finally:
+            explaining.reset(token)
+
+
+def read_entries(path=None):
+    """Записи журнала медленных запросов, включая ротированные файлы."""
+
+    path = path or settings.SLOW_QUERY_LOG_FILE
+    paths = [
+        f'{path}.{number}'
+        for number in range(settings.SLOW_QUERY_LOG_BACKUPS, 0, -1)
+    ] + [path]
+    for name in paths:
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding='utf-8') as log:
+            for line in log:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def summarize(entries):
+    """Сводка по отпечаткам: число, суммарное, p95 и наибольшее время,
+    представления и сериализаторы, текст и план. По убыванию суммы."""
+
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'], 'timings': [],
+            'views': set(), 'serializers': set(), 'sources': set(),
+            'sql': None, 'plan': None,
+        })
+        group['timings'].append(entry['ms'])
+        for field in ('view', 'serializer', 'source'):
+            if entry.get(field):
+                group[field + 's'].add(entry[field])
+        group['sql'] = entry.get('sql') or group['sql']
+        group['plan'] = entry.get('plan') or group['plan']
+    summary = []
+    for group in groups.values():
+        timings = sorted(group.pop('timings'))
+        summary.append({
+            **group,
+            'count': len(timings),
+            'total_ms': round(sum(timings), 2),
+            'p95_ms': timings[min(len(timings) - 1,
+                                  int(len(timings) * 0.95))],
+            'max_ms': timings[-1],
+        })
+    return sorted(summary, key=lambda group: -group['total_ms'])
@@ -1,18 +1,26 @@
-from django.contrib.auth.hashers import check_password, make_password
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 
 from ingredients.models import Ingredient
-from recipes.models import Recipe, RecipeIngredient, Tag
+from recipes.models import (MealPlan, MealPlanItem, PantryItem, Recipe,
+                            RecipeIngredient, Tag)
+from recipes.references import ingredient_cache, tag_cache
+from recipes.signals import recipe_ingredients_changed
+from recipes.snapshots import AUTHOR_FIELDS, build_missing_snapshots
 from users.models import User
-from .utils import add_subscribed
+from .executors import hash_password, verify_password
+from .utils import add_subscribed, cache_related, followed_ids
 
 MESSAGES = {
     'username_invalid': 'Недопустимое имя',
     'current_password_invalid': 'Текущий пароль неверный.',
-    'ingredients_unic': 'Невозможно добавить одинаковый ингредиент'
+    'ingredients_unic': 'Невозможно добавить одинаковый ингредиент',
+    'ingredient_not_found': 'Ингредиент не найден.',
+    'tag_not_found': 'Тег не найден.',
+    'references_changed': 'Ингредиент или тег удален, повторите запрос.',
 }
 
 
@@ -47,7 +55,7 @@ class UserSerializer(serializers.ModelSerializer):
             validate_password(value)
         except ValidationError as exc:
             raise serializers.ValidationError(str(exc))
-        return make_password(value)
+        return hash_password(value)
 
     def get_is_subscribed(self, obj):
         request = self.context.get('request')
@@ -73,7 +81,7 @@ class UserSetPasswordSerializer(serializers.ModelSerializer):
     def validate(self, data):
         """Проверка паролей."""
 
-        if not check_password(
+        if not verify_password(
             data['current_password'], self.instance.password
         ):
             raise serializers.ValidationError(
@@ -85,7 +93,7 @@ class UserSetPasswordSerializer(serializers.ModelSerializer):
         except ValidationError as exc:
             raise serializers.ValidationError({'new_password': str(exc)})
 
-        data['password'] = make_password(data['new_password'])
+        data['password'] = hash_password(data['new_password'])
         return data
 
 
@@ -152,41 +160,110 @@ class RecipeSerializer(serializers.ModelSerializer):
         )
 
     def validate(self, data):
+        """Ингредиенты и теги проверяются по кэшу справочников
+        и заменяются объектами для записи без дополнительных запросов."""
 
-        unic_ingredients = list()
-        for ingredient in data['recipe_ingredients']:
-            if ingredient in unic_ingredients:
-                raise serializers.ValidationError(MESSAGES['ingredients_unic'])
-            unic_ingredients.append(ingredient)
+        if 'recipe_ingredients' in data:
+            self.validate_recipe_ingredients(data['recipe_ingredients'])
+
+        # tags - поле только для чтения, DRF его не проверяет. При
+        # частичном обновлении без tags теги рецепта не меняются.
+        if 'tags' not in self.initial_data:
+            if self.partial:
+                return data
+            raise serializers.ValidationError(
+                {'tags': serializers.Field.default_error_messages['required']}
+            )
+        try:
+            tag_ids = list(dict.fromkeys(
+                int(pk) for pk in self.initial_data['tags']
+            ))
+        except (TypeError, ValueError):
+            raise serializers.ValidationError(MESSAGES['tag_not_found'])
+        tags = tag_cache.get_many(tag_ids)
+        if len(tags) != len(tag_ids):
+            raise serializers.ValidationError(MESSAGES['tag_not_found'])
+        data['tags'] = [tags[pk] for pk in tag_ids]
         return data
 
+    def validate_recipe_ingredients(self, recipe_ingredients):
+        ingredient_ids = [
+            ingrow['ingredient']['id'] for ingrow in recipe_ingredients
+        ]
+        if len(set(ingredient_ids)) != len(ingredient_ids):
+            raise serializers.ValidationError(MESSAGES['ingredients_unic'])
+        ingredients = ingredient_cache.get_many(ingredient_ids)
+        if len(ingredients) != len(ingredient_ids):
+            raise serializers.ValidationError(MESSAGES['ingredient_not_found'])
+        for ingrow in recipe_ingredients:
+            ingrow['ingredient'] = ingredients[ingrow['ingredient']['id']]
+
     def create_ingredients_tags(self, instance, ingredients, tags):
-        RecipeIngredient.objects.bulk_create(
+        """Одна вставка на таблицу; записанные строки сохраняются
+        как prefetch-кэш экземпляра для ответа."""
+
+        recipe_ingredients = RecipeIngredient.objects.bulk_create(
             [RecipeIngredient(
-                ingredient_id=ingrow['ingredient']['id'],
+                ingredient=ingrow['ingredient'],
                 recipe=instance,
                 amount=ingrow['amount']
             ) for ingrow in ingredients]
         )
-        instance.tags.set(tags)
+        through = Recipe.tags.through
+        through.objects.bulk_create(
+            [through(recipe=instance, tag=tag) for tag in tags]
+        )
+        cache_related(instance, 'recipe_ingredients', recipe_ingredients)
+        cache_related(instance, 'tags', tags)
+        recipe_ingredients_changed.send(
+            sender=Recipe,
+            instance=instance,
+            ingredient_ids=[ingrow['ingredient'].id
+                            for ingrow in ingredients],
+        )
 
     def create(self, validated_data):
+        """Ингредиент или тег, удаленный после проверки, дает ошибку
+        валидации, а не 500; рецепт без строк не сохраняется."""
 
         validated_data['author'] = self.context['request'].user
         recipe_ingredients = validated_data.pop('recipe_ingredients')
-        tag_list = self.initial_data['tags']
-        instance = Recipe.objects.create(**validated_data)
-        instance.tags.set(tag_list)
-        self.create_ingredients_tags(instance, recipe_ingredients, tag_list)
+        tags = validated_data.pop('tags')
+        try:
+            with transaction.atomic():
+                instance = Recipe.objects.create(**validated_data)
+                self.create_ingredients_tags(
+                    instance, recipe_ingredients, tags
+                )
+        except IntegrityError:
+            raise serializers.ValidationError(MESSAGES['references_changed'])
         return instance
 
     def update(self, instance, validated_data):
-
-        recipe_ingredients = validated_data.pop('recipe_ingredients')
-        tag_list = self.initial_data['tags']
-        instance.recipe_ingredients.all().delete()
-        self.create_ingredients_tags(instance, recipe_ingredients, tag_list)
-        return super().update(instance, validated_data)
+        """PATCH без ingredients или tags сохраняет текущие строки."""
+
+        recipe_ingredients = validated_data.pop('recipe_ingredients', None)
+        if recipe_ingredients is None:
+            recipe_ingredients = [
+                {'ingredient': row.ingredient, 'amount': row.amount}
+                for row in instance.recipe_ingredients.select_related(
+                    'ingredient'
+                )
+            ]
+        tags = validated_data.pop('tags', None)
+        if tags is None:
+            tags = list(instance.tags.all())
+        try:
+            with transaction.atomic():
+                instance.recipe_ingredients.all().delete()
+                Recipe.tags.through.objects.filter(recipe=instance).delete()
+                instance = super().update(instance, validated_data)
+                self.create_ingredients_tags(
+                    instance, recipe_ingredients, tags
+                )
+        except IntegrityError:
+            raise serializers.ValidationError(MESSAGES['references_changed'])
+        return instance
 
     def status(self, obj):
         request = self.context.get('request')
@@ -207,6 +284,75 @@ class RecipeSerializer(serializers.ModelSerializer):
         return self.status(obj.shopping_card)
 
 
+class RecipeSnapshotListSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        recipes = list(data)
+        self.child.load_flags(recipes)
+        self.child.missing = build_missing_snapshots(recipes)
+        return super().to_representation(recipes)
+
+
+class RecipeSnapshotSerializer(serializers.BaseSerializer):
+    """Рецепт из снимка Recipe.snapshot в формате RecipeSerializer.
+    К снимку добавляются только признаки текущего пользователя,
+    для страницы списка - одним запросом на каждый признак.
+    Рецепты со сброшенным снимком сериализуются из таблиц."""
+
+    class Meta:
+        list_serializer_class = RecipeSnapshotListSerializer
+
+    def load_flags(self, recipes):
+        self.favorited = self.in_shopping_cart = set()
+        request = self.context.get('request')
+        if not (request and request.user.is_authenticated):
+            return
+        ids = [recipe.id for recipe in recipes]
+        self.favorited, self.in_shopping_cart = (
+            set(getattr(Recipe, relation).through.objects.filter(
+                user=request.user, recipe_id__in=ids
+            ).values_list('recipe_id', flat=True))
+            for relation in ('favorite', 'shopping_card')
+        )
+
+    def to_representation(self, instance):
+        if not hasattr(self, 'favorited'):
+            self.load_flags([instance])
+            self.missing = build_missing_snapshots([instance])
+        snapshot = instance.snapshot or self.missing[instance.pk]
+        request = self.context.get('request')
+
+        author = {
+            field: snapshot['author'][field] for field in AUTHOR_FIELDS
+        }
+        author['is_subscribed'] = bool(
+            request and request.user.is_authenticated
+            and author['id'] in followed_ids(request)
+        )
+        image = snapshot['image']
+        if image and request:
+            image = request.build_absolute_uri(image)
+        return {
+            'id': snapshot['id'],
+            'name': snapshot['name'],
+            'image': image,
+            'text': snapshot['text'],
+            'cooking_time': snapshot['cooking_time'],
+            'author': author,
+            'ingredients': [
+                {field: row[field] for field in (
+                    RecipeIngredientsSerializer.Meta.fields
+                )} for row in snapshot['ingredients']
+            ],
+            'tags': [
+                {field: tag[field] for field in TagSerializer.Meta.fields}
+                for tag in snapshot['tags']
+            ],
+            'is_favorited': instance.id in self.favorited,
+            'is_in_shopping_cart': instance.id in self.in_shopping_cart,
+        }
+
+
 class RecipeShotSerializer(serializers.ModelSerializer):
     """Сериализер для Рецептов.
     Информация о рецепте для листа подписок и избранное.
@@ -248,4 +394,46 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         return add_subscribed(obj, request)
 
     def get_recipes_count(self, obj):
-        return User.objects.get(id=obj.id).recipes.count()
+        recipes_count = getattr(obj, 'recipes_count', None)
+        if recipes_count is None:
+            return obj.recipes.count()
+        return recipes_count
+
+
+class MealPlanItemSerializer(serializers.ModelSerializer):
+    """Рецепт в плане. Для записи - только id рецепта, день и порции."""
+
+    recipe = serializers.IntegerField(source='recipe_id')
+    name = serializers.ReadOnlyField(source='recipe.name')
+    day = serializers.IntegerField(min_value=0, max_value=6)
+    servings = serializers.FloatField(
+        min_value=0.1, max_value=100, default=1
+    )
+
+    class Meta:
+        model = MealPlanItem
+        fields = ('recipe', 'name', 'day', 'servings')
+
+
+class MealPlanSerializer(serializers.ModelSerializer):
+    """Сериализер для плана питания."""
+
+    items = MealPlanItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = MealPlan
+        fields = ('id', 'name', 'start_date', 'items')
+
+
+class PantryItemSerializer(serializers.ModelSerializer):
+    """Сериализер для запаса ингредиента."""
+
+    id = serializers.IntegerField(source='ingredient_id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+
+    class Meta:
+        model = PantryItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from ingredients.models import Ingredient
+from recipes.models import Recipe, Tag
+from recipes.signals import recipe_ingredients_changed
+from users.models import User
+from .authentication import token_cache
+from .payloads import ingredient_payload, invalidate_recipe_pages, tag_payload
+
+
+@receiver(post_delete, sender=Token)
+def revoke_deleted_token(sender, instance, **kwargs):
+    """Выход (logout) удаляет токен."""
+
+    token_cache.discard(instance.key)
+    token_cache.revoke_user(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def revoke_updated_user(sender, instance, created, **kwargs):
+    """Смена пароля, блокировка и любое изменение пользователя."""
+
+    if not created:
+        token_cache.revoke_user(instance.pk)
+
+
+# Готовые справочники и кэш страниц рецептов (api.payloads).
+# Версии меняются после фиксации транзакции: при откате кэш не
+# сбрасывается, а другой процесс не кэширует под новой версией
+# еще не зафиксированные данные.
+def reset_tag_payload():
+    tag_payload.invalidate()
+    invalidate_recipe_pages()
+
+
+def reset_ingredient_payload():
+    ingredient_payload.invalidate()
+    invalidate_recipe_pages()
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_payload(sender, **kwargs):
+    transaction.on_commit(reset_tag_payload)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_payload(sender, **kwargs):
+    transaction.on_commit(reset_ingredient_payload)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def invalidate_recipe_page_cache(sender, **kwargs):
+    transaction.on_commit(invalidate_recipe_pages)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_pages(sender, instance, **kwargs):
+    """author_changed выставляет recipes.signals.detect_author_change."""
+
+    if getattr(instance, 'author_changed', False):
+        transaction.on_commit(invalidate_recipe_pages)
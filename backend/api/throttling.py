@@ -0,0 +1,103 @@
+import hashlib
+import re
+import time
+
+from django.core.cache import cache
+from rest_framework.authentication import get_authorization_header
+from rest_framework.throttling import BaseThrottle
+
+from foodgram import settings
+
+# Ключ DRF Token - 40 шестнадцатеричных символов.
+TOKEN_KEY = re.compile(r'^[0-9a-f]{40}$')
+# Токен, уже прошедший проверку по БД (ставит CachedTokenAuthentication).
+KNOWN_TOKEN_KEY = 'throttle-token:{}'
+KNOWN_TOKEN_TIMEOUT = 24 * 60 * 60
+
+
+def parse_bucket(value):
+    """'емкость/секунды' -> (емкость, пополнение токенов в секунду)."""
+
+    capacity, seconds = value.split('/')
+    return int(capacity), int(capacity) / float(seconds)
+
+
+def consume(scope, ident):
+    """Списать токен из корзины scope для ident.
+    None, если запрос разрешен, иначе секунды до следующего токена.
+    Состояние (токены, время) хранится в кэше Django."""
+
+    capacity, rate = parse_bucket(settings.THROTTLE_BUCKETS[scope])
+    key = f'throttle:{scope}:{ident}'
+    now = time.time()
+    tokens, updated = cache.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    timeout = int(capacity / rate) + 1
+    if tokens < 1:
+        cache.set(key, (tokens, now), timeout)
+        return (1 - tokens) / rate
+    cache.set(key, (tokens - 1, now), timeout)
+    return None
+
+
+def token_digest(request):
+    """sha1 ключа из заголовка 'Token <ключ>' или None.
+    Регистр ключевого слова и пробелы на результат не влияют,
+    заголовки другого вида и ключи неверного формата отбрасываются."""
+
+    parts = get_authorization_header(request).split()
+    if len(parts) != 2 or parts[0].lower() != b'token':
+        return None
+    if not TOKEN_KEY.match(parts[1].decode('latin-1')):
+        return None
+    return hashlib.sha1(parts[1]).hexdigest()
+
+
+def remember_token(key):
+    cache.set(
+        KNOWN_TOKEN_KEY.format(hashlib.sha1(key.encode()).hexdigest()),
+        True, KNOWN_TOKEN_TIMEOUT,
+    )
+
+
+def request_ident(request):
+    """Идентификатор клиента без обращения к БД: хэш ключа токена,
+    если этот токен уже проходил аутентификацию, иначе IP-адрес.
+    Произвольный заголовок не дает клиенту новую корзину."""
+
+    digest = token_digest(request)
+    if digest is not None and cache.get(KNOWN_TOKEN_KEY.format(digest)):
+        return digest
+    return BaseThrottle().get_ident(request)
+
+
+class ScopedTokenBucketThrottle(BaseThrottle):
+    """Token bucket по области view.throttle_scope.
+    Бюджеты областей задаются в settings.THROTTLE_BUCKETS."""
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None:
+            return True
+        self.wait_time = consume(scope, request_ident(request))
+        return self.wait_time is None
+
+    def wait(self):
+        return self.wait_time
+
+
+class ThrottleBeforeAuthMixin:
+    """Проверка ограничений до аутентификации и проверки прав.
+    Отклоненный запрос не обращается к БД за токеном."""
+
+    throttle_scope = None
+
+    def perform_authentication(self, request):
+        self.check_throttles(request)
+        super().perform_authentication(request)
+
+    def check_throttles(self, request):
+        if getattr(request, '_throttles_checked', False):
+            return
+        request._throttles_checked = True
+        super().check_throttles(request)
@@ -1,8 +1,10 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import (IngredientViewSet, RecipeViewSet, SubscriptionViewSet,
-                    TagViewSet, UserViewSet)
+from foodgram import settings
+from .views import (IngredientViewSet, MealPlanViewSet, PantryViewSet,
+                    RecipeViewSet, SubscriptionViewSet, TagViewSet,
+                    UserViewSet, health)
 
 app_name = 'api'
 
@@ -14,9 +16,25 @@ router.register('ingredients', IngredientViewSet, basename='ingredients')
 router.register('users', UserViewSet, basename='users')
 router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('tags', TagViewSet, basename='tags')
+router.register('meal_plans', MealPlanViewSet, basename='meal_plans')
+router.register('pantry', PantryViewSet, basename='pantry')
 
 
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
+    path('health/', health, name='health'),
 ]
+
+if settings.ASYNC_VIEWS:
+
+    from . import async_views
+    urlpatterns = [
+        path('tags/', async_views.tag_list),
+        path('ingredients/', async_views.ingredient_list),
+        path('recipes/', async_views.recipe_list),
+        path(
+            'recipes/download_shopping_cart/',
+            async_views.download_shopping_cart,
+        ),
+    ] + urlpatterns
@@ -1,11 +1,16 @@
 import os
 from io import BytesIO
 
+from django.db import connections, router
+from django.db.models import Sum
 from django.http import HttpResponse, HttpResponseBadRequest
 from django.template.loader import get_template
-from xhtml2pdf import pisa
+from django.utils import timezone
 
 from foodgram import settings
+from recipes.models import Recipe, RecipeIngredient
+
+SHOPPING_CART_TEMPLATE = 'download_shopping_cart.html'
 
 
 def fetch_pdf_resources(uri, rel=None):
@@ -23,6 +28,10 @@ def fetch_pdf_resources(uri, rel=None):
 
 
 def render_to_pdf(template_src, context_dict={}):
+    # xhtml2pdf тянет ReportLab, html5lib и Pillow, поэтому импортируется
+    # при первой выгрузке, а не при старте каждого воркера.
+    from xhtml2pdf import pisa
+
     template = get_template(template_src)
 
     html = template.render(context_dict)
@@ -38,10 +47,79 @@ def render_to_pdf(template_src, context_dict={}):
     return HttpResponseBadRequest()
 
 
+def shopping_cart_context(user, about):
+    """Контекст шаблона списка покупок.
+    Запросы вычисляются сразу, чтобы рендер можно было вынести в поток."""
+
+    card_recipes = list(Recipe.objects.filter(shopping_card=user))
+    card_ingredients = list(
+        RecipeIngredient.objects.filter(recipe__in=card_recipes)
+        .values('ingredient__name', 'ingredient__measurement_unit')
+        .annotate(total=Sum('amount'))
+    )
+    return shopping_list_context(card_recipes, card_ingredients, about)
+
+
+def shopping_list_context(card_recipes, card_ingredients, about):
+    """Контекст шаблона списка покупок по готовым данным."""
+
+    return {
+        'pagesize': settings.PDF_PAGE_SIZE,
+        'card_recipes': card_recipes,
+        'card_ingredients': card_ingredients,
+        'time_label': timezone.now().strftime('%b %d %Y %H:%M:%S'),
+        'about': about,
+    }
+
+
+def followed_ids(request):
+    """Id авторов, на которых подписан текущий пользователь.
+    Загружаются одним запросом при первом обращении и хранятся
+    в объекте запроса до конца его обработки."""
+
+    ids = getattr(request, '_followed_ids', None)
+    if ids is None:
+        ids = set(request.user.follower.values_list('follow_id', flat=True))
+        request._followed_ids = ids
+    return ids
+
+
 def add_subscribed(obj, request):
     if request and hasattr(request, 'user'):
         return (
             request.user.is_authenticated
-            and request.user.follower.filter(follow=obj).exists()
+            and obj.id in followed_ids(request)
         )
     return False
+
+
+def cache_related(instance, name, objects):
+    """Заполняет prefetch-кэш связи name уже известными объектами,
+    как это делает prefetch_related, чтобы сериализация экземпляра
+    не запрашивала их повторно."""
+
+    queryset = getattr(instance, name).all()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    instance.__dict__.setdefault('_prefetched_objects_cache', {})[
+        name
+    ] = queryset
+
+
+def insert_ignore(model, **values):
+    """Вставка одной строки без проверки существования:
+    INSERT ... ON CONFLICT DO NOTHING. True, если строка добавлена."""
+
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    columns = ', '.join(
+        quote(model._meta.get_field(name).column) for name in values
+    )
+    placeholders = ', '.join(['%s'] * len(values))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+            f'VALUES ({placeholders}) ON CONFLICT DO NOTHING',
+            list(values.values()),
+        )
+        return cursor.rowcount == 1
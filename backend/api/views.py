@@ -1,22 +1,41 @@
-from django.db.models import OuterRef, Prefetch, Subquery, Sum
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.db.models import Count, OuterRef, Prefetch, Q, Subquery
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
-from rest_framework import status, viewsets
-from rest_framework.decorators import action
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import (action, api_view,
+                                       authentication_classes,
+                                       permission_classes)
 from rest_framework import permissions
 from rest_framework.response import Response
 
 from foodgram import settings
+from users.directory import search_users
 from users.models import Subscription, User
 from ingredients.models import Ingredient
-from recipes.models import Recipe, Tag, RecipeIngredient
-from .filters import IngredientSearchFilter
+from ingredients.search import autocomplete
+from recipes.feed import cached_feed_ids, feed_queryset, invalidate_feed
+from recipes.matching import ingredient_index
+from recipes.mealplans import shopping_list
+from recipes.nutrition import recipe_totals
+from recipes.related import related_ids
+from recipes.events import event_buffer
+from recipes.models import (ActivityEvent, MealPlan, MealPlanItem,
+                            PantryItem, Recipe, Tag)
+from .filters import IngredientSearchFilter, filter_recipes
+from .pagination import DirectoryPagination, FeedPagination
+from .payloads import (ingredient_payload, payload_response,
+                       recipe_page_key, tag_payload)
 from .permissions import AuthorOrReadOnly
-from .serializers import (IngredientSerializer, RecipeSerializer,
-                          RecipeShotSerializer, SubscriptionSerializer,
+from .serializers import (IngredientSerializer, MealPlanItemSerializer,
+                          MealPlanSerializer, PantryItemSerializer,
+                          RecipeSerializer, RecipeShotSerializer,
+                          RecipeSnapshotSerializer, SubscriptionSerializer,
                           TagSerializer, UserSerializer,
                           UserSetPasswordSerializer)
-from .utils import render_to_pdf
+from .throttling import ThrottleBeforeAuthMixin
+from .utils import (SHOPPING_CART_TEMPLATE, insert_ignore, render_to_pdf,
+                    shopping_cart_context, shopping_list_context)
 
 MESSAGES = {
     'self_subscription': 'Подписка на себя не допускается.',
@@ -25,10 +44,14 @@ MESSAGES = {
     'relation_already_exists': 'Эта связь уже существует.',
     'relation_not_exists': 'Не удается удалить. Этой связи не существует.',
     'pdf_about': 'Приятного аппетита',
+    'ingredients_required': 'Укажите id ингредиентов в параметре ingredients.',
+    'recipes_not_found': 'Рецепты не найдены: {}.',
+    'ingredients_not_found': 'Ингредиенты не найдены: {}.',
+    'meal_plan_too_large': 'В плане не может быть больше {} рецептов.',
 }
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ThrottleBeforeAuthMixin, viewsets.ModelViewSet):
     """ViewSet управления пользователями.
     Запросы к пользователю осуществляются по username.
     При обращении на 'me' пользователь получает/изменяет свою запись."""
@@ -62,6 +85,24 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = UserSerializer(request.user, context={'request': request})
         return Response(serializer.data)
 
+    @action(
+        detail=False, methods=['get'],
+        pagination_class=DirectoryPagination, throttle_scope='search')
+    def directory(self, request):
+        """Справочник пользователей: ?search= ищет по началу username,
+        имени или фамилии. Keyset-пагинация по username (?cursor=, ?limit=).
+        """
+
+        queryset = search_users(
+            User.objects.only(
+                'id', 'username', 'first_name', 'last_name', 'email'
+            ),
+            request.query_params.get('search', ''),
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(
         detail=False, methods=['post'],
         permission_classes=(permissions.IsAuthenticated,))
@@ -80,7 +121,8 @@ class UserViewSet(viewsets.ModelViewSet):
 
     @action(
         detail=True, methods=['post', 'delete'],
-        permission_classes=(permissions.IsAuthenticated,))
+        permission_classes=(permissions.IsAuthenticated,),
+        throttle_scope='toggle')
     def subscribe(self, request, id=None):
         """Подпишитесь на пользователя, если метод POST.
         Отключена подписка на себя и дубль подписки.
@@ -94,72 +136,119 @@ class UserViewSet(viewsets.ModelViewSet):
             )
 
         follow_user = get_object_or_404(User, id=id)
-        me = get_object_or_404(User, id=request.user.id)
-        subscribe_queryset = me.follower.filter(follow=follow_user).exists()
 
         if request._request.method == 'POST':
-            if subscribe_queryset:
+            if not insert_ignore(
+                Subscription, follower=request.user.id, follow=follow_user.id
+            ):
                 return Response(
                     {'detail': MESSAGES['double_subscription']},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            me.follower.create(follow=follow_user)
+            event_buffer.record(
+                ActivityEvent.SUBSCRIBE, request.user.id, follow_user.id
+            )
+            if settings.FEED_FANOUT:
+                invalidate_feed(request.user.id)
             serializer = SubscriptionSerializer(follow_user)
             return Response(serializer.data)
 
-        if not subscribe_queryset:
+        deleted, _ = Subscription.objects.filter(
+            follower=request.user, follow=follow_user
+        ).delete()
+        if not deleted:
             return Response(
                 {'detail': MESSAGES['no_subscribed']},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        me.follower.filter(follow=follow_user).delete()
+        event_buffer.record(
+            ActivityEvent.UNSUBSCRIBE, request.user.id, follow_user.id
+        )
+        if settings.FEED_FANOUT:
+            invalidate_feed(request.user.id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class IngredientViewSet(viewsets.ModelViewSet):
+class IngredientViewSet(ThrottleBeforeAuthMixin, viewsets.ModelViewSet):
     """Набор представлений для ингредиентов.
     Поддержка только GET, ограниченная permission.
-    Поддержка поиска по имени пользователя"""
+    Поддержка поиска по имени пользователя.
+    Полный список при общем кэше отдается готовым ответом
+    из api.payloads."""
 
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (IngredientSearchFilter,)
     search_fields = ('^name',)
     pagination_class = None
+    throttle_scope = 'search'
 
+    def list(self, request, *args, **kwargs):
+        """?name= - автодополнение: не больше INGREDIENT_AUTOCOMPLETE_LIMIT
+        ингредиентов по началу названия без учета регистра и ё/е,
+        ?compact=true - массив [id, name, measurement_unit]."""
+
+        if 'name' not in request.GET:
+            return (
+                payload_response(request, ingredient_payload)
+                or super().list(request, *args, **kwargs)
+            )
+        return Response(autocomplete(
+            self.get_queryset(),
+            request.GET['name'],
+            settings.INGREDIENT_AUTOCOMPLETE_LIMIT,
+            settings.INGREDIENT_MIN_PREFIX,
+            compact=request.GET.get('compact') == 'true',
+        ))
 
-class RecipeViewSet(viewsets.ModelViewSet):
+
+class RecipeViewSet(ThrottleBeforeAuthMixin, viewsets.ModelViewSet):
     """ВьюСет для Рецептов"""
 
     serializer_class = RecipeSerializer
     permission_classes = (AuthorOrReadOnly,)
 
-    def get_queryset(self):
-
-        queryset = Recipe.objects.all()
-        tag_list = self.request.GET.getlist('tags')
-        if tag_list:
-            queryset = queryset.filter(tags__slug__in=tag_list).distinct()
+    def get_throttles(self):
+        if self.action == 'list' and self.request.GET.get('search'):
+            self.throttle_scope = 'search'
+        return super().get_throttles()
 
-        author = self.request.GET.get('author')
-        if author:
-            queryset = queryset.filter(author__id=author)
-
-        if not self.request.user.is_authenticated:
-            return queryset
+    def uses_snapshots(self):
+        return settings.RECIPE_SNAPSHOTS and self.action in (
+            'list', 'retrieve'
+        )
 
-        is_in_shopping_cart = self.request.GET.get('is_in_shopping_cart')
-        if is_in_shopping_cart:
-            queryset = queryset.filter(shopping_card=self.request.user)
+    def get_serializer_class(self):
+        if self.uses_snapshots():
+            return RecipeSnapshotSerializer
+        return super().get_serializer_class()
 
-        is_favorited = self.request.GET.get('is_favorited')
-        if is_favorited:
-            queryset = queryset.filter(favorite=self.request.user)
+    def get_queryset(self):
 
-        return queryset
+        if self.uses_snapshots():
+            queryset = Recipe.objects.only('id', 'snapshot')
+        else:
+            queryset = Recipe.objects.select_related(
+                'author'
+            ).prefetch_related('tags', 'recipe_ingredients__ingredient')
+        return filter_recipes(queryset, self.request.GET, self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        """Страницы для анонимных пользователей с фильтром только по
+        тегам кэшируются на RECIPE_PAGE_CACHE_TIMEOUT секунд."""
+
+        key = recipe_page_key(request, request.user)
+        if key is None:
+            return super().list(request, *args, **kwargs)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, settings.RECIPE_PAGE_CACHE_TIMEOUT)
+        return response
 
     def add_remove_m2m_relation(
-            self, request, model_main, model_mgr, pk, serializer_class
+            self, request, model_main, model_mgr, pk, serializer_class, events
     ):
         """Добавить отношение "многие ко многим" к пользовательской модели,
         если метод POST.
@@ -167,32 +256,40 @@ class RecipeViewSet(viewsets.ModelViewSet):
         Удалить рецепт из избранного, если метод УДАЛЕН.
         Удалить отношение "многие ко многим", если метод DELETE.
         Отключено удаление, если рецепта нет в избранном.
-        Отключено удаление, если связь не существует."""
+        Отключено удаление, если связь не существует.
+        Вставка и удаление - одним запросом, без проверки существования;
+        событие events[0] или events[1] пишется в журнал пакетом."""
 
         main = get_object_or_404(model_main, pk=pk)
-        manager = getattr(main, model_mgr)
-        m2m_relation = manager.filter(id=request.user.id).exists()
+        through = getattr(model_main, model_mgr).through
+        relation = {
+            model_main._meta.model_name: main.pk,
+            'user': request.user.id,
+        }
+        add_event, remove_event = events
 
         if request._request.method == 'POST':
-            if m2m_relation:
+            if not insert_ignore(through, **relation):
                 return Response(
                     {'detail': MESSAGES['relation_already_exists']},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            manager.add(request.user)
+            event_buffer.record(add_event, request.user.id, main.pk)
             serializer = serializer_class(main)
             return Response(serializer.data)
 
-        if not m2m_relation:
+        deleted, _ = through.objects.filter(**relation).delete()
+        if not deleted:
             return Response(
                 {'detail': MESSAGES['relation_not_exists']},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        manager.remove(request.user)
+        event_buffer.record(remove_event, request.user.id, main.pk)
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @action(detail=True, methods=['post', 'delete'])
+    @action(
+        detail=True, methods=['post', 'delete'], throttle_scope='toggle')
     def favorite(self, request, pk=None):
         """Добавить любимый рецепт, если метод POST.
         Отключены дубликаты записи.
@@ -200,10 +297,12 @@ class RecipeViewSet(viewsets.ModelViewSet):
         Отключено удаление, если рецепта нет в избранном"""
 
         return self.add_remove_m2m_relation(
-            request, Recipe, 'favorite', pk, RecipeShotSerializer
+            request, Recipe, 'favorite', pk, RecipeShotSerializer,
+            (ActivityEvent.FAVORITE_ADD, ActivityEvent.FAVORITE_REMOVE),
         )
 
-    @action(detail=True, methods=['post', 'delete'])
+    @action(
+        detail=True, methods=['post', 'delete'], throttle_scope='toggle')
     def shopping_cart(self, request, pk=None):
         """Добавить в карточку покупок пользователя рецепт,
         если используется метод POST.
@@ -211,32 +310,120 @@ class RecipeViewSet(viewsets.ModelViewSet):
         Удалить рецепт из карточки покупок, если метод DELETE."""
 
         return self.add_remove_m2m_relation(
-            request, Recipe, 'shopping_card', pk, RecipeShotSerializer
+            request, Recipe, 'shopping_card', pk, RecipeShotSerializer,
+            (ActivityEvent.CART_ADD, ActivityEvent.CART_REMOVE),
         )
 
     @action(
         detail=False, methods=['get'],
-        permission_classes=(AuthorOrReadOnly,))
-    def download_shopping_cart(self, request):
+        permission_classes=(permissions.IsAuthenticated,),
+        pagination_class=FeedPagination)
+    def feed(self, request):
+        """Лента: последние рецепты авторов из подписок пользователя.
+        Keyset-пагинация по дате публикации (?cursor=, ?limit=)."""
+
+        queryset = feed_queryset(request.user).select_related(
+            'author'
+        ).prefetch_related('tags', 'recipe_ingredients__ingredient')
+        paginator = self.paginator
+        page_size = paginator.get_page_size(request)
+        recipes = None
+        if (
+            settings.FEED_FANOUT
+            and paginator.is_first_page(request)
+            and page_size < settings.FEED_CACHE_SIZE
+        ):
+            ids = cached_feed_ids(request.user)[:page_size + 1]
+            recipes = queryset.in_bulk(ids)
+        if recipes is not None and len(recipes) == len(ids):
+            page = paginator.paginate_cached(
+                [recipes[pk] for pk in ids], request
+            )
+        else:
+            # В кэше id удаленного рецепта или отписки: короткая страница
+            # скрыла бы остальную ленту, поэтому ответ строится из БД.
+            if recipes is not None:
+                invalidate_feed(request.user.id)
+            page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'], throttle_scope='search')
+    def match(self, request):
+        """Что приготовить из имеющихся ингредиентов.
+        Рецепты по убыванию доли найденных ингредиентов,
+        ?ingredients=1&ingredients=2."""
+
+        try:
+            ingredient_ids = [
+                int(value) for value in request.GET.getlist('ingredients')
+            ]
+        except ValueError:
+            ingredient_ids = None
+        if not ingredient_ids:
+            return Response(
+                {'detail': MESSAGES['ingredients_required']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        card_recipes = Recipe.objects.filter(shopping_card=request.user)
-        card_ingredients = (
-            RecipeIngredient.objects.filter(recipe__in=card_recipes)
-            .values('ingredient__name', 'ingredient__measurement_unit')
-            .annotate(total=Sum('amount'))
+        page = self.paginate_queryset(ingredient_index.match(ingredient_ids))
+        recipes = Recipe.objects.prefetch_related(
+            'tags', 'recipe_ingredients__ingredient'
+        ).select_related('author').in_bulk(
+            [recipe_id for recipe_id, _, _ in page]
+        )
+        data = []
+        for recipe_id, matched, total in page:
+            if recipe_id not in recipes:
+                continue
+            item = self.get_serializer(recipes[recipe_id]).data
+            item.update(matched=matched, total=total)
+            data.append(item)
+        return self.get_paginated_response(data)
+
+    @action(detail=True, methods=['get'])
+    def related(self, request, pk=None):
+        """Похожие рецепты по ингредиентам и тегам, по убыванию сходства.
+        Список соседей хранится в рецепте и читается одним запросом."""
+
+        recipe = get_object_or_404(Recipe.objects.only('id', 'related'), pk=pk)
+        ids = related_ids(recipe)
+        recipes = Recipe.objects.only(
+            'id', 'name', 'image', 'cooking_time'
+        ).in_bulk(ids)
+        serializer = RecipeShotSerializer(
+            [recipes[i] for i in ids if i in recipes], many=True,
+            context={'request': request},
         )
+        return Response(serializer.data)
 
-        timenow = timezone.now()
-        time_label = timenow.strftime('%b %d %Y %H:%M:%S')
-        template_card = 'download_shopping_cart.html'
-        context = {
-            'pagesize': settings.PDF_PAGE_SIZE,
-            'card_recipes': card_recipes,
-            'card_ingredients': card_ingredients,
-            'time_label': time_label,
-            'about': MESSAGES['pdf_about'],
-        }
-        return render_to_pdf(template_card, context)
+    @action(detail=True, methods=['get'])
+    def nutrition(self, request, pk=None):
+        """Калории, белки, жиры, углеводы и цена рецепта.
+        missing - id ингредиентов без данных о пищевой ценности."""
+
+        recipe = get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        result = recipe_totals(Recipe.objects.filter(pk=recipe.pk))
+        return Response({**result['total'], 'missing': result['missing']})
+
+    @action(
+        detail=False, methods=['get'],
+        permission_classes=(permissions.IsAuthenticated,))
+    def shopping_cart_nutrition(self, request):
+        """Итоги корзины покупок и каждого рецепта в ней."""
+
+        return Response(recipe_totals(
+            Recipe.objects.filter(shopping_card=request.user)
+        ))
+
+    @action(
+        detail=False, methods=['get'],
+        permission_classes=(AuthorOrReadOnly,),
+        throttle_scope='pdf')
+    def download_shopping_cart(self, request):
+
+        context = shopping_cart_context(request.user, MESSAGES['pdf_about'])
+        return render_to_pdf(SHOPPING_CART_TEMPLATE, context)
 
 
 class TagViewSet(viewsets.ModelViewSet):
@@ -245,6 +432,12 @@ class TagViewSet(viewsets.ModelViewSet):
     serializer_class = TagSerializer
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        return (
+            payload_response(request, tag_payload)
+            or super().list(request, *args, **kwargs)
+        )
+
 
 class SubscriptionViewSet(viewsets.ModelViewSet):
 
@@ -256,7 +449,11 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
         followed_people = (
             Subscription.objects.filter(follower=user).values('follow')
         )
-        subscription = User.objects.filter(id__in=followed_people)
+        # GROUP BY отбрасывает Meta.ordering, без явной сортировки
+        # страницы пагинации не стабильны.
+        subscription = User.objects.filter(
+            id__in=followed_people
+        ).annotate(recipes_count=Count('recipes')).order_by('username', 'id')
         recipes_limit = int(self.request.GET.get('recipes_limit'))
         if recipes_limit:
             subqry = Subquery(
@@ -272,3 +469,176 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
             )
 
         return subscription
+
+
+class MealPlanViewSet(ThrottleBeforeAuthMixin, viewsets.ModelViewSet):
+    """План питания: рецепты по дням недели с множителем порций.
+    Рецепты добавляются и удаляются списком одним запросом."""
+
+    serializer_class = MealPlanSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get_queryset(self):
+        queryset = MealPlan.objects.filter(user=self.request.user)
+        if self.action in ('items', 'shopping_list', 'download'):
+            return queryset
+        return queryset.prefetch_related(Prefetch(
+            'items', queryset=MealPlanItem.objects.select_related(
+                'recipe'
+            ).only('plan', 'recipe', 'day', 'servings', 'recipe__name')
+        ))
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=True, methods=['post', 'delete'])
+    def items(self, request, pk=None):
+        """POST - добавить рецепты [{recipe, day, servings}, ...]
+        (порции уже добавленных обновляются), DELETE - удалить
+        [{recipe, day}, ...]."""
+
+        plan = self.get_object()
+        serializer = MealPlanItemSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        # Повтор пары (рецепт, день) в одном запросе: действует последний,
+        # ON CONFLICT не может обновить строку дважды.
+        items = list({
+            (item['recipe_id'], item['day']): item
+            for item in serializer.validated_data
+        }.values())
+
+        if request.method == 'DELETE':
+            condition = Q()
+            for item in items:
+                condition |= Q(recipe_id=item['recipe_id'], day=item['day'])
+            if items:
+                MealPlanItem.objects.filter(condition, plan=plan).delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        recipe_ids = {item['recipe_id'] for item in items}
+        missing = recipe_ids - set(Recipe.objects.filter(
+            id__in=recipe_ids
+        ).values_list('id', flat=True))
+        if missing:
+            return Response(
+                {'detail': MESSAGES['recipes_not_found'].format(
+                    ', '.join(map(str, sorted(missing)))
+                )},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        existing = set(plan.items.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'day'))
+        added = sum(
+            (item['recipe_id'], item['day']) not in existing
+            for item in items
+        )
+        if plan.items.count() + added > settings.MEAL_PLAN_MAX_ITEMS:
+            return Response(
+                {'detail': MESSAGES['meal_plan_too_large'].format(
+                    settings.MEAL_PLAN_MAX_ITEMS
+                )},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        MealPlanItem.objects.bulk_create(
+            [MealPlanItem(plan=plan, **item) for item in items],
+            update_conflicts=True,
+            unique_fields=['plan', 'recipe', 'day'],
+            update_fields=['servings'],
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def shopping_list(self, request, pk=None):
+        """Сводный список ингредиентов плана, ?pantry=true - за вычетом
+        запасов пользователя."""
+
+        plan = self.get_object()
+        rows = shopping_list(plan, request.GET.get('pantry') == 'true')
+        return Response([
+            {
+                'id': row['ingredient'],
+                'name': row['name'],
+                'measurement_unit': row['measurement_unit'],
+                'amount': round(row['amount'], 1),
+            } for row in rows
+        ])
+
+    @action(detail=True, methods=['get'], throttle_scope='pdf')
+    def download(self, request, pk=None):
+        """Список покупок плана в PDF (формат как у корзины)."""
+
+        plan = self.get_object()
+        rows = shopping_list(plan, request.GET.get('pantry') == 'true')
+        context = shopping_list_context(
+            list(Recipe.objects.filter(meal_plan_items__plan=plan).distinct()),
+            [
+                {
+                    'ingredient__name': row['name'],
+                    'ingredient__measurement_unit': row['measurement_unit'],
+                    'total': round(row['amount'], 1),
+                } for row in rows
+            ],
+            MESSAGES['pdf_about'],
+        )
+        return render_to_pdf(SHOPPING_CART_TEMPLATE, context)
+
+
+class PantryViewSet(mixins.ListModelMixin, mixins.DestroyModelMixin,
+                    viewsets.GenericViewSet):
+    """Запасы ингредиентов пользователя.
+    POST [{id, amount}, ...] задает количества одним запросом,
+    DELETE /pantry/{id ингредиента}/ удаляет запас."""
+
+    serializer_class = PantryItemSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = None
+    lookup_field = 'ingredient'
+
+    def get_queryset(self):
+        return PantryItem.objects.filter(
+            user=self.request.user
+        ).select_related('ingredient')
+
+    def create(self, request):
+        serializer = PantryItemSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data
+        ingredient_ids = {item['ingredient_id'] for item in items}
+        missing = ingredient_ids - set(Ingredient.objects.filter(
+            id__in=ingredient_ids
+        ).values_list('id', flat=True))
+        if missing:
+            return Response(
+                {'detail': MESSAGES['ingredients_not_found'].format(
+                    ', '.join(map(str, sorted(missing)))
+                )},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        PantryItem.objects.bulk_create(
+            [PantryItem(user=request.user, **item) for item in items],
+            update_conflicts=True,
+            unique_fields=['user', 'ingredient'],
+            update_fields=['amount'],
+        )
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@authentication_classes(())
+@permission_classes((permissions.AllowAny,))
+def health(request):
+    """Проверка работоспособности для балансировщика и docker.
+    Без аутентификации, проверяется только ответ БД на SELECT 1:
+    открытое соединение еще не значит, что сервер БД отвечает."""
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except DatabaseError:
+        return Response(
+            {'status': 'unavailable'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    return Response({'status': 'ok'})
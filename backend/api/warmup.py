@@ -0,0 +1,172 @@
+import logging
+import time
+from collections import Counter
+from itertools import combinations
+from urllib.parse import urlsplit
+
+from django.db import DatabaseError, connection, connections
+from django.test import RequestFactory
+from django.urls import reverse
+
+from foodgram import settings
+from ingredients.models import Ingredient
+from recipes.matching import ingredient_index
+from recipes.models import Recipe, RecipeIngredient, Tag
+from recipes.nutrition import nutrition_table
+from recipes.references import ingredient_cache, tag_cache
+from users.models import User
+from .payloads import ingredient_payload, tag_payload
+
+logger = logging.getLogger(__name__)
+
+# Таблицы горячих путей: список и карточка рецепта, справочники.
+HOT_MODELS = (Recipe, Recipe.tags.through, RecipeIngredient, Ingredient,
+              Tag, User)
+
+PREWARM_SQL = """
+    SELECT COALESCE(SUM(pg_prewarm(oid)), 0) FROM (
+        SELECT %s::regclass::oid AS oid
+        UNION ALL
+        SELECT indexrelid FROM pg_index WHERE indrelid = %s::regclass
+    ) AS relations
+"""
+
+
+def has_pg_prewarm():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_extension WHERE extname = 'pg_prewarm'"
+        )
+        return cursor.fetchone() is not None
+
+
+def touch_indexes():
+    """Чтение таблиц горячих путей и их индексов в буферный кэш БД.
+    С расширением pg_prewarm - таблицы и все индексы целиком, иначе
+    проход по первичным ключам и индексу автодополнения ингредиентов.
+    Возвращает число прочитанных блоков или строк."""
+
+    if has_pg_prewarm():
+        blocks = 0
+        with connection.cursor() as cursor:
+            for model in HOT_MODELS:
+                table = model._meta.db_table
+                cursor.execute(PREWARM_SQL, [table, table])
+                blocks += cursor.fetchone()[0]
+        return blocks
+    rows = 0
+    for model in HOT_MODELS:
+        for _ in model.objects.order_by('pk').values_list(
+            'pk', flat=True
+        ).iterator():
+            rows += 1
+    for _ in Ingredient.objects.order_by('search_name').values_list(
+        'search_name', flat=True
+    ).iterator():
+        rows += 1
+    return rows
+
+
+def common_tag_sets(pairs=None):
+    """Фильтры по тегам для прогрева: без фильтра, каждый тег и pairs
+    самых частых пар тегов у рецептов (WARM_TAG_PAIRS)."""
+
+    pairs = settings.WARM_TAG_PAIRS if pairs is None else pairs
+    slugs = list(Tag.objects.values_list('slug', flat=True))
+    recipe_tags = {}
+    for recipe_id, slug in Recipe.tags.through.objects.values_list(
+        'recipe_id', 'tag__slug'
+    ).iterator():
+        recipe_tags.setdefault(recipe_id, []).append(slug)
+    counter = Counter(
+        pair for tags in recipe_tags.values()
+        for pair in combinations(sorted(tags), 2)
+    )
+    return (
+        [[]] + [[slug] for slug in slugs]
+        + [list(pair) for pair, _ in counter.most_common(pairs)]
+    )
+
+
+def prime_recipe_pages(base_url=None, tag_sets=None, pages=None):
+    """Первые страницы списка рецептов для анонимных пользователей
+    в кэше страниц. Ключ кэша зависит от адреса сайта, поэтому запросы
+    строятся для base_url (WARM_CACHE_BASE_URL). Число страниц."""
+
+    from .views import RecipeViewSet
+
+    address = urlsplit(base_url or settings.WARM_CACHE_BASE_URL)
+    tag_sets = common_tag_sets() if tag_sets is None else tag_sets
+    pages = pages or settings.WARM_RECIPE_PAGES
+    view = RecipeViewSet.as_view({'get': 'list'})
+    factory = RequestFactory()
+    primed = 0
+    for tags in tag_sets:
+        for page in range(1, pages + 1):
+            params = {'tags': tags}
+            if page > 1:
+                params['page'] = page
+            response = view(factory.get(
+                reverse('api:recipes-list'), params,
+                HTTP_HOST=address.netloc, secure=address.scheme == 'https',
+            ))
+            if response.status_code != 200:
+                break
+            primed += 1
+            if not response.data['next']:
+                break
+    return primed
+
+
+def warm_caches(base_url=None, prime_pages=True):
+    """Прогрев после деплоя. Список (шаг, секунды, результат).
+    Готовые справочники и страницы рецептов хранятся в кэше Django и
+    прогреваются только при SHARED_CACHE: LocMemCache другого процесса
+    воркерам не виден. Индекс ингредиентов и таблица пищевой ценности
+    живут в памяти процесса и полезны только при запуске сервера."""
+
+    steps = []
+    if settings.SHARED_CACHE:
+        steps += [
+            ('tag payload', lambda: len(tag_payload.get()[0])),
+            ('ingredient payload',
+             lambda: len(ingredient_payload.get()[0])),
+            ('reference caches', lambda: len(tag_cache.get_many(
+                Tag.objects.values_list('id', flat=True)
+            )) + len(ingredient_cache.get_many(
+                Ingredient.objects.values_list('id', flat=True)
+            ))),
+        ]
+    steps += [
+        ('ingredient index', ingredient_index.ensure_fresh),
+        ('nutrition table', nutrition_table.ensure_fresh),
+        ('indexes', touch_indexes),
+    ]
+    if (
+        prime_pages and settings.SHARED_CACHE
+        and settings.RECIPE_PAGE_CACHE_TIMEOUT
+    ):
+        steps.append(('recipe pages', lambda: prime_recipe_pages(base_url)))
+    results = []
+    for name, step in steps:
+        started = time.perf_counter()
+        result = step()
+        results.append((name, time.perf_counter() - started, result))
+    return results
+
+
+def warm_on_startup():
+    """Прогрев из хуков gunicorn при WARM_CACHE_ON_STARTUP: в мастере
+    до fork при preload_app, иначе в каждом воркере. Соединения с БД
+    закрываются, чтобы воркеры не унаследовали сокеты мастера.
+    Ошибка БД (например, до migrate) не мешает запуску."""
+
+    try:
+        for name, seconds, result in warm_caches():
+            logger.info('Warm %s: %.3fs (%s)', name, seconds, result)
+    except DatabaseError as error:
+        logger.warning('Cache warming skipped: %s', error)
+    finally:
+        connections.close_all()
@@ -0,0 +1,56 @@
+"""Общие утилиты для нагрузочных замеров.
+
+Используется только стандартная библиотека, чтобы скрипты можно было
+запускать на сервере без установки дополнительных пакетов.
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+
+def fetch(url, headers=None, method='GET'):
+    """Один запрос: (статус, размер ответа, время в секундах)."""
+
+    request = Request(url, headers=headers or {}, method=method)
+    started = time.perf_counter()
+    try:
+        with urlopen(request) as response:
+            status, size = response.status, len(response.read())
+    except HTTPError as exc:
+        status, size = exc.code, len(exc.read())
+    return status, size, time.perf_counter() - started
+
+
+def run_load(url, total, concurrency, headers=None, method='GET'):
+    """Нагрузка на url: total запросов в concurrency потоков."""
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(
+            lambda _: fetch(url, headers, method), range(total)
+        ))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(result[2] for result in results)
+    return {
+        'requests': total,
+        'concurrency': concurrency,
+        'errors': sum(1 for result in results if result[0] >= 400),
+        'rps': total / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'bytes': statistics.mean(result[1] for result in results),
+    }
+
+
+def print_table(rows, columns):
+    """Печать результатов в виде таблицы."""
+
+    print(' | '.join(f'{column:>12}' for column in columns))
+    for row in rows:
+        print(' | '.join(
+            f'{row[column]:>12.1f}' if isinstance(row[column], float)
+            else f'{row[column]:>12}'
+            for column in columns
+        ))
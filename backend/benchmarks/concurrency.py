@@ -0,0 +1,55 @@
+"""Сравнение пропускной способности WSGI (sync) и ASGI (async) режимов.
+
+Оба сервера запускаются заранее, например:
+
+    gunicorn -b :8000 -w 2 foodgram.wsgi
+    ASYNC_VIEWS=True gunicorn -b :8001 -w 2 \\
+        -k uvicorn.workers.UvicornWorker foodgram.asgi:application
+
+Запуск замера:
+
+    python -m benchmarks.concurrency http://localhost:8000 \\
+        http://localhost:8001 --token <token>
+"""
+import argparse
+
+from .common import print_table, run_load
+
+ENDPOINTS = (
+    '/api/tags/',
+    '/api/ingredients/?name=%D1%81',
+    '/api/recipes/?page=1&limit=6',
+    '/api/recipes/download_shopping_cart/',
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sync_url')
+    parser.add_argument('async_url')
+    parser.add_argument('--token', help='токен для списка покупок')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument(
+        '--concurrency', type=int, nargs='+', default=[1, 10, 50]
+    )
+    args = parser.parse_args()
+    headers = {'Authorization': f'Token {args.token}'} if args.token else {}
+
+    rows = []
+    for endpoint in ENDPOINTS:
+        for concurrency in args.concurrency:
+            for mode, base in (('sync', args.sync_url),
+                               ('async', args.async_url)):
+                result = run_load(
+                    base + endpoint, args.requests, concurrency, headers
+                )
+                result.update(endpoint=endpoint[:24], mode=mode)
+                rows.append(result)
+    print_table(rows, (
+        'endpoint', 'mode', 'concurrency', 'rps', 'p50_ms', 'p95_ms',
+        'errors',
+    ))
+
+
+if __name__ == '__main__':
+    main()
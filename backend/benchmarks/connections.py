@@ -0,0 +1,44 @@
+"""Сравнение RPS с постоянными соединениями/пулом и без них.
+
+Два экземпляра backend запускаются заранее, например:
+
+    DB_CONN_MAX_AGE=0 gunicorn -c gunicorn.conf.py -b :8000
+    DB_CONN_MAX_AGE=60 gunicorn -c gunicorn.conf.py -b :8001
+
+или второй через PgBouncer (DB_HOST=pgbouncer DB_PORT=6432). Затем:
+
+    python -m benchmarks.connections http://localhost:8000 \\
+        http://localhost:8001
+"""
+import argparse
+
+from .common import print_table, run_load
+
+ENDPOINTS = (
+    '/api/health/',
+    '/api/tags/',
+    '/api/recipes/?page=1&limit=6',
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('off_url', help='без пула (CONN_MAX_AGE=0)')
+    parser.add_argument('on_url', help='с постоянными соединениями или пулом')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    args = parser.parse_args()
+
+    rows = []
+    for endpoint in ENDPOINTS:
+        for mode, base in (('off', args.off_url), ('on', args.on_url)):
+            result = run_load(base + endpoint, args.requests, args.concurrency)
+            result.update(endpoint=endpoint[:24], pooling=mode)
+            rows.append(result)
+    print_table(rows, (
+        'endpoint', 'pooling', 'rps', 'p50_ms', 'p95_ms', 'errors',
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Лента подписок против запросов по каждому автору.
+
+Создает во временной транзакции (откатывается в конце) авторов с
+рецептами и пользователя, подписанного на 10, 100 и 1000 авторов:
+
+    python -m benchmarks.feed
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+from recipes.feed import feed_queryset  # noqa: E402
+from recipes.models import Recipe  # noqa: E402
+from users.models import Subscription, User  # noqa: E402
+
+from .common import print_table  # noqa: E402
+
+
+def create_data(authors, recipes_per_author):
+    users = User.objects.bulk_create(
+        User(username=f'bench{i}', email=f'bench{i}@example.com',
+             first_name='bench', last_name='bench')
+        for i in range(authors + 1)
+    )
+    reader, authors = users[0], users[1:]
+    Recipe.objects.bulk_create(
+        Recipe(name=f'recipe {i}', text='bench', cooking_time=10,
+               image='recipes/images/bench.jpg', author=author)
+        for author in authors for i in range(recipes_per_author)
+    )
+    return reader, authors
+
+
+def measure(function, repeat):
+    best, queries = None, 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        queries = len(context.captured_queries)
+    return best * 1000, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--follows', type=int, nargs='+',
+                        default=[10, 100, 1000])
+    parser.add_argument('--recipes-per-author', type=int, default=20)
+    parser.add_argument('--page-size', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    with transaction.atomic():
+        reader, authors = create_data(
+            max(args.follows), args.recipes_per_author
+        )
+        for follows in args.follows:
+            Subscription.objects.filter(follower=reader).delete()
+            Subscription.objects.bulk_create(
+                Subscription(follower=reader, follow=author)
+                for author in authors[:follows]
+            )
+
+            def feed_page():
+                list(feed_queryset(reader)[:args.page_size])
+
+            def per_author():
+                recipes = []
+                for author in User.objects.filter(follow__follower=reader):
+                    recipes += Recipe.objects.filter(author=author)[
+                        :args.page_size
+                    ]
+                sorted(recipes, key=lambda recipe: recipe.pub_date)
+
+            for method, function in (('feed', feed_page),
+                                     ('per_author', per_author)):
+                best_ms, queries = measure(function, args.repeat)
+                rows.append({
+                    'follows': follows, 'method': method,
+                    'queries': queries, 'best_ms': best_ms,
+                })
+        transaction.set_rollback(True)
+    print_table(rows, ('follows', 'method', 'queries', 'best_ms'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Профиль импорта (-X importtime) и память при старте процесса.
+
+Сравнивает загрузку приложения с ленивым импортом стека PDF (как сейчас
+работают manage.py и воркеры без preload) и с принудительным импортом
+xhtml2pdf (прежнее поведение api/utils.py).
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --top 30
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+SCENARIOS = {
+    'lazy': 'import api.urls',
+    'eager': 'import api.urls; import xhtml2pdf.pisa',
+}
+
+SETUP = (
+    'import os, resource, django;'
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings');"
+    'django.setup();'
+    '{statement};'
+    'import sys;'
+    'print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, '
+    'file=sys.stdout)'
+)
+
+
+def profile(statement):
+    """Запуск интерпретатора с -X importtime.
+    Возвращает пиковый RSS (кБ) и {модуль: кумулятивное время, мкс}."""
+
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         SETUP.format(statement=statement)],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    modules = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            modules[name.strip()] = int(cumulative)
+    return int(process.stdout.split()[-1]), modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--top', type=int, default=15,
+        help='сколько самых медленных пакетов верхнего уровня показать',
+    )
+    args = parser.parse_args()
+
+    results = {name: profile(stmt) for name, stmt in SCENARIOS.items()}
+    for name, (rss, modules) in results.items():
+        print(
+            f'{name:>6}: imports {sum(modules.values()) / 1e6:.3f}s, '
+            f'max rss {rss / 1024:.1f} MB, {len(modules)} top-level modules'
+        )
+    lazy_rss, lazy_modules = results['lazy']
+    eager_rss, eager_modules = results['eager']
+    saved = sum(eager_modules.values()) - sum(lazy_modules.values())
+    print(
+        f'saved: {saved / 1e6:.3f}s, '
+        f'{(eager_rss - lazy_rss) / 1024:.1f} MB per process'
+    )
+
+    print('\nslowest top-level imports (eager):')
+    slowest = sorted(eager_modules.items(), key=lambda item: -item[1])
+    for module, cumulative in slowest[:args.top]:
+        marker = '' if module in lazy_modules else '  [lazy now]'
+        print(f'{cumulative / 1000:>10.1f} ms  {module}{marker}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Размер ответа и задержка автодополнения ингредиентов по длине префикса.
+
+Нужна БД с загруженными ингредиентами (manage.py loaddata). Сравнивает
+прежний ответ (все совпадения через IngredientSerializer) с ограниченным
+списком словарей и компактными кортежами:
+
+    python -m benchmarks.ingredient_autocomplete --lengths 1 2 3 4
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from api.serializers import IngredientSerializer  # noqa: E402
+from foodgram import settings  # noqa: E402
+from ingredients.models import Ingredient  # noqa: E402
+from ingredients.search import autocomplete  # noqa: E402
+
+from .common import print_table  # noqa: E402
+
+
+def legacy(prefix):
+    return IngredientSerializer(
+        Ingredient.objects.filter(name__istartswith=prefix), many=True
+    ).data
+
+
+def capped(prefix, compact):
+    return autocomplete(
+        Ingredient.objects.all(), prefix,
+        settings.INGREDIENT_AUTOCOMPLETE_LIMIT,
+        settings.INGREDIENT_MIN_PREFIX, compact=compact,
+    )
+
+
+MODES = {
+    'legacy': legacy,
+    'dicts': lambda prefix: capped(prefix, compact=False),
+    'compact': lambda prefix: capped(prefix, compact=True),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+',
+                        default=[1, 2, 3, 4])
+    parser.add_argument('--samples', type=int, default=50)
+    args = parser.parse_args()
+    rng = random.Random(42)
+    names = list(Ingredient.objects.values_list('name', flat=True))
+    if not names:
+        parser.error('нет ингредиентов, выполните manage.py loaddata')
+
+    rows = []
+    for length in args.lengths:
+        prefixes = [
+            name[:length] for name in rng.choices(names, k=args.samples)
+        ]
+        for mode, run in MODES.items():
+            sizes, timings, found = [], [], []
+            for prefix in prefixes:
+                started = time.perf_counter()
+                data = run(prefix)
+                body = json.dumps(data, ensure_ascii=False).encode()
+                timings.append((time.perf_counter() - started) * 1000)
+                sizes.append(len(body))
+                found.append(len(data))
+            rows.append({
+                'prefix': length, 'mode': mode,
+                'results': statistics.mean(found),
+                'bytes': statistics.mean(sizes),
+                'p50_ms': statistics.median(timings),
+            })
+    print_table(rows, ('prefix', 'mode', 'results', 'bytes', 'p50_ms'))
+
+
+if __name__ == '__main__':
+    main()
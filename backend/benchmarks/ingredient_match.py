@@ -0,0 +1,69 @@
+"""Задержка подбора рецептов по ингредиентам на синтетическом индексе.
+
+Индекс строится в памяти без БД, популярность ингредиентов распределена
+по закону Ципфа (соль и сахар встречаются почти везде):
+
+    python -m benchmarks.ingredient_match --recipes 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from recipes.matching import IngredientIndex  # noqa: E402
+
+
+def synthetic_pairs(recipes, ingredients, per_recipe, rng):
+    weights = [1 / rank for rank in range(1, ingredients + 1)]
+    for recipe_id in range(1, recipes + 1):
+        chosen = set(rng.choices(range(1, ingredients + 1), weights,
+                                 k=per_recipe))
+        for ingredient_id in chosen:
+            yield ingredient_id, recipe_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--ingredients', type=int, default=2000)
+    parser.add_argument('--per-recipe', type=int, default=10)
+    parser.add_argument('--query-size', type=int, nargs='+',
+                        default=[1, 3, 5, 10])
+    parser.add_argument('--page-size', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    index = IngredientIndex(ttl=float('inf'))
+    started = time.perf_counter()
+    index.build(synthetic_pairs(
+        args.recipes, args.ingredients, args.per_recipe, rng
+    ))
+    print(f'build: {time.perf_counter() - started:.2f}s '
+          f'for {args.recipes} recipes')
+
+    for size in args.query_size:
+        timings, found = [], []
+        for _ in range(args.repeat):
+            query = rng.sample(range(1, args.ingredients // 10), size)
+            started = time.perf_counter()
+            result = index.match(query)
+            result[:args.page_size]
+            timings.append((time.perf_counter() - started) * 1000)
+            found.append(len(result))
+        timings.sort()
+        print(
+            f'{size:>3} ingredients: found ~{int(statistics.mean(found))}, '
+            f'p50 {statistics.median(timings):.2f} ms, '
+            f'p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Запросы и время сборки списка покупок плана питания.
+
+Во временной транзакции (откатывается в конце) создает рецепты
+с ингредиентами, добавляет их в план одним запросом к API и собирает
+список покупок с запасами и без:
+
+    python -m benchmarks.meal_plan --recipes 100 500
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from ingredients.models import Ingredient  # noqa: E402
+from recipes.models import MealPlan, Recipe, RecipeIngredient  # noqa: E402
+from users.models import User  # noqa: E402
+
+from .common import print_table  # noqa: E402
+
+
+def create_data(recipes, per_recipe):
+    user = User.objects.create(
+        username='bench-plan', email='bench-plan@example.com',
+        first_name='bench', last_name='bench',
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=f'bench plan {i}', measurement_unit='г')
+        for i in range(per_recipe * 5)
+    )
+    created = Recipe.objects.bulk_create(
+        Recipe(name=f'plan recipe {i}', text='bench', cooking_time=10,
+               image='recipes/images/bench.jpg', author=user)
+        for i in range(recipes)
+    )
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe=recipe, amount=100,
+            ingredient=ingredients[(i + j * 5) % len(ingredients)],
+        )
+        for i, recipe in enumerate(created) for j in range(per_recipe)
+    )
+    plan = MealPlan.objects.create(
+        user=user, name='bench', start_date='2024-01-01'
+    )
+    return Token.objects.create(user=user), plan, created
+
+
+def measure(rows, label, request):
+    with CaptureQueriesContext(connection) as context:
+        started = time.perf_counter()
+        response = request()
+        elapsed = (time.perf_counter() - started) * 1000
+    rows.append({
+        'step': label, 'status': response.status_code,
+        'queries': len(context.captured_queries), 'ms': elapsed,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipes', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--per-recipe', type=int, default=10)
+    args = parser.parse_args()
+
+    rows = []
+    for recipes in args.recipes:
+        with transaction.atomic():
+            token, plan, created = create_data(recipes, args.per_recipe)
+            client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+            url = f'/api/meal_plans/{plan.id}/'
+            items = [
+                {'recipe': recipe.id, 'day': i % 7, 'servings': 1.5}
+                for i, recipe in enumerate(created)
+            ]
+            measure(rows, f'add {recipes}', lambda: client.post(
+                url + 'items/', items, content_type='application/json'
+            ))
+            measure(rows, f'list {recipes}', lambda: client.get(
+                url + 'shopping_list/'
+            ))
+            measure(rows, f'pantry {recipes}', lambda: client.get(
+                url + 'shopping_list/?pantry=true'
+            ))
+            transaction.set_rollback(True)
+    print_table(rows, ('step', 'status', 'queries', 'ms'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Расчет пищевой ценности рецептов каталога: построчно и на NumPy.
+
+Таблица и строки RecipeIngredient синтетические, БД не используется:
+
+    python -m benchmarks.nutrition --recipes 100000
+"""
+import argparse
+import os
+import random
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+import numpy as np  # noqa: E402
+
+from recipes.nutrition import (COLUMNS, UNIT_GRAMS,  # noqa: E402
+                               NutritionTable, as_arrays)
+
+from .common import print_table  # noqa: E402
+
+
+def synthetic_table(ingredients, rng):
+    units = list(UNIT_GRAMS)
+    return [
+        (ingredient_id, rng.choice(units), None,
+         *(rng.uniform(0, 500) for _ in COLUMNS))
+        for ingredient_id in range(1, ingredients + 1)
+    ]
+
+
+def synthetic_rows(recipes, ingredients, per_recipe, rng):
+    for recipe_id in range(1, recipes + 1):
+        for ingredient_id in rng.sample(range(1, ingredients + 1),
+                                        per_recipe):
+            yield recipe_id, ingredient_id, rng.randint(1, 500)
+
+
+def python_totals(table, rows):
+    """Построчный расчет: словарь коэффициентов и цикл по строкам."""
+
+    coefficients = {
+        ingredient_id: [value * UNIT_GRAMS[unit] / 100 for value in values]
+        for ingredient_id, unit, _, *values in table
+    }
+    totals = {}
+    for recipe_id, ingredient_id, amount in rows:
+        recipe = totals.setdefault(recipe_id, [0.0] * len(COLUMNS))
+        for column, value in enumerate(coefficients[ingredient_id]):
+            recipe[column] += amount * value
+    return totals
+
+
+def numpy_totals(nutrition, rows):
+    recipe_ids, ingredient_ids, amounts = as_arrays(rows)
+    recipes, groups = np.unique(recipe_ids, return_inverse=True)
+    return nutrition.totals(groups, ingredient_ids, amounts, len(recipes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--ingredients', type=int, default=2000)
+    parser.add_argument('--per-recipe', type=int, default=10)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    table = synthetic_table(args.ingredients, rng)
+    rows = list(synthetic_rows(
+        args.recipes, args.ingredients, args.per_recipe, rng
+    ))
+    nutrition = NutritionTable(ttl=float('inf'))
+    nutrition.build(table)
+
+    results = []
+    for name, run in (
+        ('python', lambda: python_totals(table, rows)),
+        ('numpy', lambda: numpy_totals(nutrition, rows)),
+    ):
+        started = time.perf_counter()
+        run()
+        results.append({
+            'engine': name, 'rows': len(rows),
+            'ms': (time.perf_counter() - started) * 1000,
+        })
+    print_table(results, ('engine', 'rows', 'ms'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Число SQL-запросов на страницу списков API и на создание рецепта.
+
+Создает во временной транзакции (откатывается в конце) пользователей,
+подписки и рецепты и запрашивает списки через тестовый клиент Django.
+Рецепт создается дважды: с холодным и с прогретым кэшем справочников
+(файл картинки остается в MEDIA_ROOT):
+
+    python -m benchmarks.query_counts --users 50 --recipes 200
+"""
+import argparse
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from ingredients.models import Ingredient  # noqa: E402
+from recipes.models import Recipe, Tag  # noqa: E402
+from recipes.references import ingredient_cache, tag_cache  # noqa: E402
+from users.models import Subscription, User  # noqa: E402
+
+from .common import print_table  # noqa: E402
+
+ENDPOINTS = (
+    '/api/users/?page=1&limit=6',
+    '/api/users/?page=1&limit=50',
+    '/api/recipes/?page=1&limit=6',
+    '/api/recipes/?page=1&limit=50',
+    '/api/users/subscriptions/?page=1&limit=6&recipes_limit=3',
+    '/api/recipes/feed/?limit=6',
+)
+
+PIXEL = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAA'
+    'DUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=='
+)
+
+
+def recipe_payload(ingredients, tags):
+    return {
+        'name': 'bench recipe', 'text': 'bench', 'cooking_time': 10,
+        'image': PIXEL,
+        'ingredients': [
+            {'id': ingredient.id, 'amount': 10} for ingredient in ingredients
+        ],
+        'tags': [tag.id for tag in tags],
+    }
+
+
+def create_data(users, recipes):
+    people = User.objects.bulk_create(
+        User(username=f'bench{i}', email=f'bench{i}@example.com',
+             first_name='bench', last_name='bench')
+        for i in range(users)
+    )
+    reader = people[0]
+    Subscription.objects.bulk_create(
+        Subscription(follower=reader, follow=author)
+        for author in people[1::2]
+    )
+    Recipe.objects.bulk_create(
+        Recipe(name=f'recipe {i}', text='bench', cooking_time=10,
+               image='recipes/images/bench.jpg',
+               author=people[i % len(people)])
+        for i in range(recipes)
+    )
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f'bench ingredient {i}', measurement_unit='г')
+        for i in range(10)
+    )
+    Tag.objects.bulk_create(
+        Tag(name=f'bench tag {i}', color=f'#00000{i}', slug=f'bench{i}')
+        for i in range(3)
+    )
+    return Token.objects.create(user=reader)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--recipes', type=int, default=200)
+    args = parser.parse_args()
+
+    rows = []
+    with transaction.atomic():
+        token = create_data(args.users, args.recipes)
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        for endpoint in ENDPOINTS:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(endpoint)
+            rows.append({
+                'endpoint': endpoint[:40],
+                'status': response.status_code,
+                'queries': len(context.captured_queries),
+            })
+        payload = recipe_payload(
+            Ingredient.objects.filter(name__startswith='bench'),
+            Tag.objects.filter(slug__startswith='bench'),
+        )
+        ingredient_cache.invalidate()
+        tag_cache.invalidate()
+        for label in ('POST /api/recipes/ (cold)', 'POST /api/recipes/'):
+            with CaptureQueriesContext(connection) as context:
+                response = client.post(
+                    '/api/recipes/', payload, content_type='application/json'
+                )
+            rows.append({
+                'endpoint': label,
+                'status': response.status_code,
+                'queries': len(context.captured_queries),
+            })
+        transaction.set_rollback(True)
+    print_table(rows, ('endpoint', 'status', 'queries'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Полнотекстовый поиск рецептов против поиска в стиле админки (ILIKE).
+
+Запускается из каталога backend на базе с данными:
+
+    python -m benchmarks.recipe_search борщ "куриный суп" капуста
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from django.db.models import Q  # noqa: E402
+
+from recipes.models import Recipe  # noqa: E402
+from recipes.search import search_recipes  # noqa: E402
+
+from .common import print_table  # noqa: E402
+
+
+def admin_search(query):
+    """Аналог RecipeAdmin.search_fields = ('name', 'text')."""
+
+    queryset = Recipe.objects.all()
+    for word in query.split():
+        queryset = queryset.filter(
+            Q(name__icontains=word) | Q(text__icontains=word)
+        )
+    return queryset
+
+
+def measure(build, query, limit, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        found = list(build(query).values_list('id', flat=True)[:limit])
+        timings.append(time.perf_counter() - started)
+    return len(found), min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('queries', nargs='+')
+    parser.add_argument('--limit', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    for query in args.queries:
+        for method, build in (
+            ('admin', admin_search),
+            ('fts', lambda q: search_recipes(Recipe.objects.all(), q)),
+        ):
+            found, best_ms = measure(build, query, args.limit, args.repeat)
+            rows.append({
+                'query': query[:12], 'method': method,
+                'found': found, 'best_ms': best_ms,
+            })
+    print(f'recipes: {Recipe.objects.count()}')
+    print_table(rows, ('query', 'method', 'found', 'best_ms'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Пропускная способность хэширования паролей при регистрации.
+
+Сравнивает хэшеры и число потоков пула (PASSWORD_HASHING_THREADS)
+внутри одного процесса:
+
+    python -m benchmarks.signup --hashers argon2 pbkdf2 --threads 1 2 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+django.setup()
+
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.contrib.auth.password_validation import (  # noqa: E402
+    validate_password,
+)
+
+from .common import print_table  # noqa: E402
+
+HASHERS = {
+    'argon2': 'argon2',
+    'pbkdf2': 'pbkdf2_sha256',
+}
+
+
+def signup(hasher, number):
+    """Работа сериализатора регистрации без записи в БД."""
+
+    password = f'Signup-password-{number}'
+    validate_password(password)
+    return make_password(password, hasher=hasher)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hashers', nargs='+', default=list(HASHERS))
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--signups', type=int, default=40)
+    args = parser.parse_args()
+
+    rows = []
+    for name in args.hashers:
+        for threads in args.threads:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                started = time.perf_counter()
+                list(pool.map(
+                    lambda number: signup(HASHERS[name], number),
+                    range(args.signups),
+                ))
+                elapsed = time.perf_counter() - started
+            rows.append({
+                'hasher': name, 'threads': threads,
+                'signups_per_s': args.signups / elapsed,
+                'ms_each': elapsed / args.signups * 1000 * threads,
+            })
+    print_table(rows, ('hasher', 'threads', 'signups_per_s', 'ms_each'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Замер памяти воркеров gunicorn: после старта и под нагрузкой.
+
+Запуск на машине с gunicorn (Linux, нужен доступ к /proc):
+
+    python -m benchmarks.worker_memory <pid мастера> http://localhost:8000
+
+RSS завышает потребление при preload_app, поэтому дополнительно
+выводится PSS (доля общих страниц делится между процессами).
+"""
+import argparse
+import os
+
+from .common import print_table, run_load
+
+ENDPOINTS = (
+    '/api/recipes/?page=1&limit=6',
+    '/api/ingredients/?name=%D1%81',
+    '/api/recipes/download_shopping_cart/',
+)
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as file:
+        return [int(child) for child in file.read().split()]
+
+
+def memory_kb(pid):
+    """RSS и PSS процесса в килобайтах."""
+
+    rss = pss = 0
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1])
+    rollup = f'/proc/{pid}/smaps_rollup'
+    if os.path.exists(rollup):
+        with open(rollup) as smaps:
+            for line in smaps:
+                if line.startswith('Pss:'):
+                    pss = int(line.split()[1])
+    return rss, pss
+
+
+def snapshot(master, stage):
+    rows = []
+    for pid in [master] + children(master):
+        rss, pss = memory_kb(pid)
+        rows.append({
+            'stage': stage,
+            'pid': pid,
+            'role': 'master' if pid == master else 'worker',
+            'rss_kb': rss,
+            'pss_kb': pss,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('master_pid', type=int)
+    parser.add_argument('base_url')
+    parser.add_argument('--token')
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=10)
+    args = parser.parse_args()
+    headers = {'Authorization': f'Token {args.token}'} if args.token else {}
+
+    rows = snapshot(args.master_pid, 'cold')
+    for endpoint in ENDPOINTS:
+        run_load(
+            args.base_url + endpoint, args.requests, args.concurrency, headers
+        )
+    rows += snapshot(args.master_pid, 'steady')
+    print_table(rows, ('stage', 'pid', 'role', 'rss_kb', 'pss_kb'))
+
+
+if __name__ == '__main__':
+    main()
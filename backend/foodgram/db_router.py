@@ -0,0 +1,40 @@
+import random
+from contextvars import ContextVar
+
+from django.db import connections
+
+from foodgram import settings
+
+# Запрос должен читать с основной БД: небезопасный метод, недавняя запись
+# этого пользователя или запись, уже сделанная в рамках запроса.
+use_primary = ContextVar('use_primary', default=False)
+primary_written = ContextVar('primary_written', default=False)
+
+
+class ReplicaRouter:
+    """Чтение с реплик, запись и миграции только на default.
+    Чтение внутри транзакции и после записи идет на default,
+    чтобы не увидеть отставание реплики."""
+
+    def db_for_read(self, model, **hints):
+        if (
+            not settings.DATABASE_REPLICAS
+            or use_primary.get()
+            or primary_written.get()
+            or connections['default'].in_atomic_block
+        ):
+            return 'default'
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        primary_written.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        return (
+            obj1._state.db in databases and obj2._state.db in databases
+        ) or None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -1,4 +1,8 @@
+import importlib.util
 import os
+
+import django
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -62,20 +66,152 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
 
+ASGI_APPLICATION = 'foodgram.asgi.application'
+
+# Асинхронные представления для списков рецептов, тегов и ингредиентов.
+# Имеет смысл только при запуске через ASGI (uvicorn worker).
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', default=False) == 'True'
+
+# Пул потоков для блокирующей работы: рендер PDF, обработка изображений.
+BLOCKING_POOL_SIZE = int(os.getenv('BLOCKING_POOL_SIZE', 4))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.postgresql'),
         'NAME': os.getenv('POSTGRES_DB', 'foodgram'),
         'USER': os.getenv('POSTGRES_USER', 'foodgram'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', 'localhost'),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        # Постоянные соединения: секунды жизни, 0 - закрывать после запроса.
+        # Соединение держит каждый поток, всего до GUNICORN_WORKERS *
+        # GUNICORN_THREADS на контейнер (и столько же к каждой реплике),
+        # это число не должно превышать max_connections PostgreSQL.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': (
+            os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+        ),
+        # PgBouncer в режиме transaction не поддерживает серверные курсоры.
+        'DISABLE_SERVER_SIDE_CURSORS': (
+            os.getenv('DB_PGBOUNCER', default=False) == 'True'
+        ),
+        'OPTIONS': {},
+    }
+}
+
+# Локальный запуск и тесты на SQLite: DB_ENGINE=django.db.backends.sqlite3
+if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+    DATABASES['default']['NAME'] = os.path.join(BASE_DIR, 'db.sqlite3')
+
+# Реплики только для чтения: 'host[:port] host[:port]'.
+DATABASE_REPLICAS = []
+for number, address in enumerate(
+    os.getenv('DB_REPLICA_HOSTS', '').split(), start=1
+):
+    host, _, port = address.partition(':')
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['foodgram.db_router.ReplicaRouter']
+
+# Сколько секунд после записи пользователь читает с основной БД.
+REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 5))
+
+if DATABASE_REPLICAS:
+    MIDDLEWARE.insert(1, 'api.middleware.ReplicaStickinessMiddleware')
+
+# Журнал медленных запросов к БД: порог в мс, план EXPLAIN для новых
+# отпечатков, файл с ротацией. Сводка: python manage.py slow_queries.
+# Выключенный журнал не добавляет middleware и не стоит ничего.
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', default=False) == 'True'
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', default=False) == 'True'
+SLOW_QUERY_FINGERPRINTS = int(os.getenv('SLOW_QUERY_FINGERPRINTS', 1000))
+SLOW_QUERY_LOG_FILE = os.getenv(
+    'SLOW_QUERY_LOG_FILE', os.path.join(BASE_DIR, 'logs', 'slow_queries.log')
+)
+SLOW_QUERY_LOG_MAX_BYTES = int(
+    os.getenv('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024)
+)
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv('SLOW_QUERY_LOG_BACKUPS', 5))
+
+if SLOW_QUERY_LOG:
+    MIDDLEWARE.insert(0, 'api.middleware.SlowQueryLogMiddleware')
+
+# Профилирование запросов: персонал включает его заголовком
+# X-Profile: cprofile|stack или ?profile=, кроме того профилируется
+# каждый PROFILING_SAMPLE_RATE запрос (0 - нет). Профили сохраняются в
+# PROFILING_DIR, сводка: python manage.py aggregate_profiles.
+PROFILING = os.getenv('PROFILING', default=False) == 'True'
+PROFILING_DIR = os.getenv('PROFILING_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILING_SAMPLE_RATE = int(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_SAMPLE_MODE = os.getenv('PROFILING_SAMPLE_MODE', 'stack')
+PROFILING_INTERVAL_MS = float(os.getenv('PROFILING_INTERVAL_MS', 5))
+
+if PROFILING:
+    MIDDLEWARE.append('api.middleware.ProfilingMiddleware')
+
+# Встроенный пул соединений psycopg 3 (Django >= 5.1).
+# Несовместим с постоянными соединениями, поэтому CONN_MAX_AGE = 0.
+# Пул создается в каждом воркере: до GUNICORN_WORKERS * DB_POOL_MAX_SIZE
+# соединений. Больше потоков воркера (GUNICORN_THREADS) пулу не нужно.
+if os.getenv('DB_POOL', default=False) == 'True':
+    if django.VERSION < (5, 1):
+        raise ImproperlyConfigured(
+            'DB_POOL requires Django 5.1+ and psycopg 3, '
+            'use the pgbouncer profile instead.'
+        )
+    for database in DATABASES.values():
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS'] = {'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 4)),
+            'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        }}
+
+# Общий для всех воркеров кэш (redis, memcached) задается окружением,
+# например CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
+# Кэш виден всем воркерам. Кэши со сбросом по версии (готовые справочники,
+# страницы рецептов) без общего кэша не включаются.
+SHARED_CACHE = not CACHES['default']['BACKEND'].endswith(
+    ('.LocMemCache', '.DummyCache')
+)
 
 AUTH_USER_MODEL = 'users.User'
 
 
+# Алгоритм хэширования новых паролей: argon2 (если установлен
+# argon2-cffi) или pbkdf2. Остальные хэшеры проверяют старые пароли.
+PASSWORD_HASHER = os.getenv(
+    'PASSWORD_HASHER',
+    'argon2' if importlib.util.find_spec('argon2') else 'pbkdf2',
+)
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+if PASSWORD_HASHER == 'pbkdf2':
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(1))
+
+# Сколько паролей процесс хэширует одновременно. Остальные запросы
+# регистрации и смены пароля ждут, занимая свой поток воркера.
+PASSWORD_HASHING_THREADS = int(os.getenv('PASSWORD_HASHING_THREADS', 2))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -93,13 +229,33 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.CustomPagination',
     'PAGE_SIZE': 6,
+    'DEFAULT_THROTTLE_CLASSES': (
+        'api.throttling.ScopedTokenBucketThrottle',
+    ),
+}
+
+# Кэш токенов в памяти процесса: число записей и время жизни, сек.
+# Отзыв (выход, смена пароля) виден другим воркерам сразу только при
+# общем кэше. С LocMemCache отозванный токен действует в остальных
+# воркерах до AUTH_TOKEN_CACHE_TTL, поэтому по умолчанию 5 секунд.
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+AUTH_TOKEN_CACHE_TTL = int(
+    os.getenv('AUTH_TOKEN_CACHE_TTL', 300 if SHARED_CACHE else 5)
+)
+
+# Бюджеты запросов 'емкость/секунды' на клиента (токен или IP).
+# Для нескольких воркеров нужен общий кэш, см. CACHE_BACKEND.
+THROTTLE_BUCKETS = {
+    'pdf': os.getenv('THROTTLE_PDF', '3/60'),
+    'search': os.getenv('THROTTLE_SEARCH', '30/10'),
+    'toggle': os.getenv('THROTTLE_TOGGLE', '30/60'),
 }
 
 
@@ -128,3 +284,84 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 PDF_PAGE_SIZE = 'A4'
+
+# Лента подписок: fan-out on write в кэш последних FEED_CACHE_SIZE id.
+FEED_FANOUT = os.getenv('FEED_FANOUT', default=False) == 'True'
+FEED_CACHE_SIZE = int(os.getenv('FEED_CACHE_SIZE', 100))
+FEED_CACHE_TIMEOUT = int(os.getenv('FEED_CACHE_TIMEOUT', 24 * 60 * 60))
+
+# Рейтинг trending по журналу событий: вес добавления в корзину,
+# окно и период полураспада вклада события в часах.
+RANKING_CART_WEIGHT = float(os.getenv('RANKING_CART_WEIGHT', 0.5))
+RANKING_WINDOW_HOURS = int(os.getenv('RANKING_WINDOW_HOURS', 7 * 24))
+RANKING_HALF_LIFE_HOURS = float(os.getenv('RANKING_HALF_LIFE_HOURS', 24))
+# Срок хранения журнала событий, часов; не меньше окна рейтинга.
+# Старые события удаляет update_rankings.
+EVENT_RETENTION_HOURS = max(
+    int(os.getenv('EVENT_RETENTION_HOURS', RANKING_WINDOW_HOURS)),
+    RANKING_WINDOW_HOURS,
+)
+
+# Журнал событий пишется пакетами после ответа и при штатном завершении
+# воркера. При SIGKILL, OOM killer или таймауте воркера теряются события
+# из буфера процесса: меньше EVENT_BATCH_SIZE событий с последней записи.
+# Запись проверяется после каждого запроса, поэтому под нагрузкой это
+# последние EVENT_FLUSH_INTERVAL секунд, а без запросов - все время
+# простоя. Вклад потерянных событий в Recipe.popularity восстанавливает
+# update_rankings.
+EVENT_BATCH_SIZE = int(os.getenv('EVENT_BATCH_SIZE', 100))
+EVENT_FLUSH_INTERVAL = int(os.getenv('EVENT_FLUSH_INTERVAL', 5))
+
+# Список и карточка рецепта отдаются из снимка Recipe.snapshot
+# (заполнить: python manage.py backfill_snapshots).
+RECIPE_SNAPSHOTS = os.getenv('RECIPE_SNAPSHOTS', default=False) == 'True'
+
+# Автодополнение ингредиентов: наибольшее число результатов
+# и минимальная длина префикса.
+INGREDIENT_AUTOCOMPLETE_LIMIT = int(
+    os.getenv('INGREDIENT_AUTOCOMPLETE_LIMIT', 20)
+)
+INGREDIENT_MIN_PREFIX = int(os.getenv('INGREDIENT_MIN_PREFIX', 1))
+
+# Кэш страниц списка рецептов для анонимных пользователей с фильтром
+# только по тегам, сек (0 - выключен). Работает только с общим кэшем
+# (SHARED_CACHE), иначе воркеры не узнают о сбросе.
+RECIPE_PAGE_CACHE_TIMEOUT = int(os.getenv('RECIPE_PAGE_CACHE_TIMEOUT', 0))
+
+# Прогрев кэшей (python manage.py warmcache или хук gunicorn при
+# запуске сервера): адрес сайта для ссылок в кэше страниц, число частых
+# пар тегов и страниц на каждый фильтр.
+WARM_CACHE_ON_STARTUP = (
+    os.getenv('WARM_CACHE_ON_STARTUP', default=False) == 'True'
+)
+WARM_CACHE_BASE_URL = os.getenv('WARM_CACHE_BASE_URL', 'http://localhost')
+WARM_TAG_PAIRS = int(os.getenv('WARM_TAG_PAIRS', 10))
+WARM_RECIPE_PAGES = int(os.getenv('WARM_RECIPE_PAGES', 1))
+
+# Наибольшее число рецептов в плане питания.
+MEAL_PLAN_MAX_ITEMS = int(os.getenv('MEAL_PLAN_MAX_ITEMS', 500))
+
+# Кэш справочников ингредиентов и тегов для записи рецептов:
+# записей в LRU процесса, время жизни в общем кэше и в LRU, сек.
+# Работает только с общим кэшем (SHARED_CACHE), иначе - запрос к БД.
+REFERENCE_CACHE_SIZE = int(os.getenv('REFERENCE_CACHE_SIZE', 5000))
+REFERENCE_CACHE_TIMEOUT = int(
+    os.getenv('REFERENCE_CACHE_TIMEOUT', 24 * 60 * 60)
+)
+REFERENCE_CACHE_LOCAL_TTL = int(os.getenv('REFERENCE_CACHE_LOCAL_TTL', 60))
+
+# Период полной перестройки индекса ингредиентов в каждом процессе, сек.
+MATCHING_INDEX_TTL = int(os.getenv('MATCHING_INDEX_TTL', 300))
+
+# Похожие рецепты (python manage.py update_related): число соседей,
+# мера сходства cosine или jaccard, вес тегов относительно ингредиентов,
+# доля рецептов, начиная с которой признак не учитывается, и число
+# рецептов в блоке расчета сходства.
+RELATED_RECIPES_COUNT = int(os.getenv('RELATED_RECIPES_COUNT', 10))
+RELATED_METRIC = os.getenv('RELATED_METRIC', 'cosine')
+RELATED_TAG_WEIGHT = float(os.getenv('RELATED_TAG_WEIGHT', 0.5))
+RELATED_MAX_DF = float(os.getenv('RELATED_MAX_DF', 0.2))
+RELATED_CHUNK_SIZE = int(os.getenv('RELATED_CHUNK_SIZE', 256))
+
+# Период перестройки таблицы пищевой ценности в каждом процессе, сек.
+NUTRITION_TABLE_TTL = int(os.getenv('NUTRITION_TABLE_TTL', 300))
@@ -0,0 +1,120 @@
+"""Конфигурация gunicorn.
+
+Все параметры задаются переменными окружения, значения по умолчанию
+рассчитаны на контейнер с несколькими ядрами.
+"""
+import importlib
+import multiprocessing
+import os
+import time
+
+CPU_COUNT = multiprocessing.cpu_count()
+
+# Модули, импортируемые в мастер-процессе до fork при preload_app.
+# Страницы памяти с байткодом остаются общими для всех воркеров.
+# Без preload стек PDF импортируется лениво при первой выгрузке.
+WARM_IMPORTS = (
+    'rest_framework.serializers',
+    'rest_framework.views',
+    'djoser.urls.authtoken',
+    'api.urls',
+    'xhtml2pdf.pisa',
+    'reportlab.pdfgen.canvas',
+    'PIL.Image',
+)
+
+wsgi_app = os.getenv('SERVER_APP', 'foodgram.wsgi')
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# sync | gthread | uvicorn.workers.UvicornWorker (вместе с foodgram.asgi)
+worker_class = os.getenv('SERVER_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('GUNICORN_WORKERS', CPU_COUNT * 2 + 1))
+# Каждый поток держит свое соединение с БД (и с репликой): до
+# workers * threads соединений на контейнер, при 8 CPU - 17 * 4 = 68.
+# Сумма по всем контейнерам должна оставаться ниже max_connections
+# PostgreSQL (100 по умолчанию) или пула PgBouncer.
+threads = int(os.getenv(
+    'GUNICORN_THREADS', 4 if worker_class == 'gthread' else 1
+))
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Перезапуск воркеров против роста памяти после рендера PDF.
+# Разброс jitter не дает всем воркерам перезапуститься одновременно.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = os.getenv('GUNICORN_ACCESSLOG')
+loglevel = os.getenv('GUNICORN_LOGLEVEL', 'info')
+
+
+def rss_kb(pid='self'):
+    """Resident set size процесса в килобайтах (только Linux)."""
+
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    started = time.perf_counter()
+    for module in WARM_IMPORTS:
+        try:
+            importlib.import_module(module)
+        except ImportError as exc:
+            server.log.warning('Warm import %s failed: %s', module, exc)
+    # Валидаторы паролей (в том числе словарь CommonPasswordValidator)
+    # создаются один раз на процесс, здесь - до fork для всех воркеров.
+    from django.contrib.auth.password_validation import (
+        get_default_password_validators,
+    )
+    get_default_password_validators()
+    server.log.info(
+        'Warm imports done in %.3fs, master rss=%dkB',
+        time.perf_counter() - started, rss_kb(),
+    )
+    warm_caches()
+
+
+def warm_caches():
+    # Прогрев кэшей только при запуске сервера, а не в manage.py.
+    from foodgram import settings
+    if settings.WARM_CACHE_ON_STARTUP:
+        from api.warmup import warm_on_startup
+        warm_on_startup()
+
+
+def pre_fork(server, worker):
+    worker.boot_started = time.perf_counter()
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        warm_caches()
+    worker.log.info(
+        'Worker %s booted in %.3fs, rss=%dkB',
+        worker.pid, time.perf_counter() - worker.boot_started, rss_kb(),
+    )
+
+
+def worker_exit(server, worker):
+    # Несохраненные события из буфера процесса (recipes.events).
+    from recipes.events import event_buffer
+    event_buffer.flush()
+    server.log.info(
+        'Worker %s exiting after %s requests, rss=%dkB',
+        worker.pid, getattr(worker, 'nr', '?'), rss_kb(),
+    )
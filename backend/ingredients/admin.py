@@ -1,12 +1,18 @@
 from django.contrib import admin
 
-from .models import Ingredient
+from .models import Ingredient, Nutrition
+
+
+class NutritionInline(admin.StackedInline):
+    model = Nutrition
 
 
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
     search_fields = ('name',)
-    list_filter = ('name',)
+    list_filter = ('measurement_unit',)
+    show_full_result_count = False
+    inlines = (NutritionInline,)
 
 
 admin.site.register(Ingredient, IngredientAdmin)
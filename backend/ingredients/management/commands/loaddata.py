@@ -1,10 +1,12 @@
 import csv
+import json
 import os
 
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 from dotenv import load_dotenv
 
+from ingredients.models import Nutrition
 from recipes.models import Ingredient, Tag
 
 load_dotenv()
@@ -25,6 +27,8 @@ class Command(BaseCommand):
             Ingredient,
             ['name', 'measurement_unit'],
         )
+        if os.path.exists('data/nutrition.json'):
+            self.nutrition('data/nutrition.json')
 
         try:
             USER.objects.create_superuser(
@@ -44,3 +48,30 @@ class Command(BaseCommand):
                     model.objects.get_or_create(**data)
                 except Exception:
                     continue
+
+    def nutrition(self, file):
+        """Необязательная таблица пищевой ценности и цен на 100 г."""
+
+        with open(file, 'r', encoding='utf-8') as jsonfile:
+            rows = json.load(jsonfile)
+        ingredients = {
+            (name, unit): pk for pk, name, unit in Ingredient.objects.filter(
+                name__in=[row['name'] for row in rows]
+            ).values_list('id', 'name', 'measurement_unit')
+        }
+        fields = ('calories', 'proteins', 'fats', 'carbohydrates',
+                  'price', 'unit_grams')
+        objects = []
+        for row in rows:
+            pk = ingredients.get((row['name'], row['measurement_unit']))
+            if pk is not None:
+                objects.append(Nutrition(
+                    ingredient_id=pk,
+                    **{field: row.get(field) for field in fields},
+                ))
+        Nutrition.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=['ingredient'],
+            update_fields=fields,
+        )
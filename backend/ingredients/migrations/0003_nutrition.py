@@ -0,0 +1,28 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingredients', '0002_alter_ingredient_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Nutrition',
+            fields=[
+                ('ingredient', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='nutrition', serialize=False, to='ingredients.ingredient', verbose_name='Ингредиент')),
+                ('calories', models.FloatField(verbose_name='Калории, ккал')),
+                ('proteins', models.FloatField(verbose_name='Белки, г')),
+                ('fats', models.FloatField(verbose_name='Жиры, г')),
+                ('carbohydrates', models.FloatField(verbose_name='Углеводы, г')),
+                ('price', models.FloatField(blank=True, null=True, verbose_name='Цена, руб.')),
+                ('unit_grams', models.FloatField(blank=True, null=True, verbose_name='Масса единицы измерения, г')),
+            ],
+            options={
+                'verbose_name': 'Пищевая ценность',
+                'verbose_name_plural': 'Пищевая ценность',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+from ingredients.search import normalize_name
+
+
+def fill_search_name(apps, schema_editor):
+    Ingredient = apps.get_model('ingredients', 'Ingredient')
+    ingredients = list(Ingredient.objects.only('id', 'name'))
+    for ingredient in ingredients:
+        ingredient.search_name = normalize_name(ingredient.name)
+    Ingredient.objects.bulk_update(
+        ingredients, ['search_name'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingredients', '0003_nutrition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='search_name',
+            field=models.CharField(default='', editable=False, max_length=200, verbose_name='Название для поиска'),
+        ),
+        migrations.RunPython(fill_search_name, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['search_name'], name='ingredient_search_name_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from .search import normalize_name
+
 
 class Ingredient(models.Model):
 
@@ -17,6 +19,13 @@ class Ingredient(models.Model):
         blank=False,
     )
 
+    search_name = models.CharField(
+        'Название для поиска',
+        max_length=200,
+        default='',
+        editable=False,
+    )
+
     class Meta:
         verbose_name = 'Ингридиент'
         verbose_name_plural = 'Ингридиенты'
@@ -27,6 +36,46 @@ class Ingredient(models.Model):
                 name='unique_ingredient_unit',
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['search_name'],
+                name='ingredient_search_name_idx',
+                opclasses=['varchar_pattern_ops'],
+            ),
+        ]
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_name(self.name)
+        super().save(*args, **kwargs)
+
+
+class Nutrition(models.Model):
+    """Пищевая ценность и цена ингредиента на 100 г.
+    unit_grams - масса одной единицы measurement_unit, если она
+    не выводится из самой единицы (шт., банка, пучок)."""
+
+    ingredient = models.OneToOneField(
+        Ingredient,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='nutrition',
+        verbose_name='Ингредиент',
+    )
+    calories = models.FloatField('Калории, ккал')
+    proteins = models.FloatField('Белки, г')
+    fats = models.FloatField('Жиры, г')
+    carbohydrates = models.FloatField('Углеводы, г')
+    price = models.FloatField('Цена, руб.', null=True, blank=True)
+    unit_grams = models.FloatField(
+        'Масса единицы измерения, г', null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Пищевая ценность'
+        verbose_name_plural = 'Пищевая ценность'
+
+    def __str__(self):
+        return f'{self.ingredient}: {self.calories} ккал'
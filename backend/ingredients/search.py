@@ -0,0 +1,21 @@
+def normalize_name(name):
+    """Название для поиска: нижний регистр, ё -> е, одиночные пробелы."""
+
+    return ' '.join(name.lower().replace('ё', 'е').split())
+
+
+def autocomplete(queryset, prefix, limit, min_length, compact=False):
+    """Не больше limit ингредиентов, название которых начинается с prefix.
+    Префикс короче min_length не ищется. compact - кортежи
+    (id, name, measurement_unit) вместо словарей."""
+
+    prefix = normalize_name(prefix)
+    if len(prefix) < min_length:
+        return []
+    queryset = queryset.filter(
+        search_name__startswith=prefix
+    ).order_by('search_name')
+    fields = ('id', 'name', 'measurement_unit')
+    if compact:
+        return list(queryset.values_list(*fields)[:limit])
+    return list(queryset.values(*fields)[:limit])
@@ -1,10 +1,15 @@
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 
-from .models import Recipe, RecipeIngredient, Tag
+from .models import MealPlan, MealPlanItem, Recipe, RecipeIngredient, Tag
+from .search import search_recipes
+from .signals import recipe_ingredients_changed
 
 
 class RecipeIngredientsInstanceInline(admin.TabularInline):
     model = RecipeIngredient
+    autocomplete_fields = ('ingredient',)
 
 
 class RecipeTagsInstanceInline(admin.TabularInline):
@@ -13,12 +18,58 @@ class RecipeTagsInstanceInline(admin.TabularInline):
 
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('name', 'author', 'favorite_count')
-    search_fields = ('name', 'text')
-    list_filter = ('author', 'name', 'tags')
+    list_select_related = ('author',)
+    # Подстрока в названии и логине автора, описание ищется
+    # полнотекстовым индексом (get_search_results).
+    search_fields = ('name', 'author__username')
+    list_filter = ('tags',)
+    autocomplete_fields = ('author',)
     inlines = (RecipeIngredientsInstanceInline,)
+    show_full_result_count = False
 
+    def get_queryset(self, request):
+        """Число добавлений в избранное - подзапросом только
+        для строк текущей страницы."""
+
+        favorites = Recipe.favorite.through.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by().values('recipe').annotate(
+            count=Count('*')
+        ).values('count')
+        return super().get_queryset(request).annotate(
+            favorites_count=Coalesce(
+                Subquery(favorites, output_field=IntegerField()), 0
+            )
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        """Подстрока из search_fields (начало слова, незаконченный ввод)
+        или совпадение по полнотекстовому индексу рецептов."""
+
+        matched, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        if not search_term.strip():
+            return matched, may_have_duplicates
+        found = search_recipes(Recipe.objects.all(), search_term)
+        return queryset.filter(
+            Q(pk__in=matched.values('pk'))
+            | Q(pk__in=found.order_by().values('pk'))
+        ), False
+
+    @admin.display(description='В избранном', ordering='favorites_count')
     def favorite_count(self, obj):
-        return obj.favorite_count
+        return obj.favorites_count
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        recipe_ingredients_changed.send(
+            sender=Recipe,
+            instance=form.instance,
+            ingredient_ids=list(form.instance.recipe_ingredients.values_list(
+                'ingredient_id', flat=True
+            )),
+        )
 
 
 class TagAdmin(admin.ModelAdmin):
@@ -26,5 +77,19 @@ class TagAdmin(admin.ModelAdmin):
     search_fields = ('name', 'color')
 
 
+class MealPlanItemInline(admin.TabularInline):
+    model = MealPlanItem
+    autocomplete_fields = ('recipe',)
+
+
+class MealPlanAdmin(admin.ModelAdmin):
+    list_display = ('name', 'user', 'start_date')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
+    inlines = (MealPlanItemInline,)
+    show_full_result_count = False
+
+
 admin.site.register(Recipe, RecipeAdmin)
+admin.site.register(MealPlan, MealPlanAdmin)
 admin.site.register(Tag, TagAdmin)
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = 'recipes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import restore_sqlite_triggers
+
+        post_migrate.connect(
+            restore_sqlite_triggers, sender=self,
+            dispatch_uid='recipes_restore_sqlite_triggers',
+        )
@@ -0,0 +1,81 @@
+import atexit
+import threading
+import time
+
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from foodgram import settings
+from .models import ActivityEvent, Recipe
+
+# Изменение счетчика избранного для каждого вида события.
+POPULARITY_DELTA = {
+    ActivityEvent.FAVORITE_ADD: 1,
+    ActivityEvent.FAVORITE_REMOVE: -1,
+}
+
+
+class EventBuffer:
+    """Буфер событий процесса.
+    События пишутся в БД пакетами после ответа (request_finished),
+    когда накопилось EVENT_BATCH_SIZE событий или прошло
+    EVENT_FLUSH_INTERVAL секунд. Вместе с пакетом обновляются
+    счетчики популярности рецептов."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._flushed_at = time.monotonic()
+
+    def record(self, kind, user_id, target_id):
+        with self._lock:
+            self._events.append(ActivityEvent(
+                kind=kind, user_id=user_id, target_id=target_id,
+                created=timezone.now(),
+            ))
+
+    def flush_if_due(self, **kwargs):
+        if (
+            len(self._events) >= settings.EVENT_BATCH_SIZE
+            or (
+                self._events
+                and time.monotonic() - self._flushed_at
+                >= settings.EVENT_FLUSH_INTERVAL
+            )
+        ):
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            events, self._events = self._events, []
+            self._flushed_at = time.monotonic()
+        if not events:
+            return
+        ActivityEvent.objects.bulk_create(events)
+        apply_popularity(events)
+
+
+def apply_popularity(events):
+    """Изменение счетчиков popularity одним UPDATE на пакет."""
+
+    deltas = {}
+    for event in events:
+        delta = POPULARITY_DELTA.get(event.kind)
+        if delta:
+            deltas[event.target_id] = deltas.get(event.target_id, 0) + delta
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    Recipe.objects.filter(id__in=deltas).update(popularity=Greatest(
+        F('popularity') + Case(
+            *(When(id=pk, then=Value(delta)) for pk, delta in deltas.items()),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    ))
+
+
+event_buffer = EventBuffer()
+atexit.register(event_buffer.flush)
@@ -0,0 +1,73 @@
+from django.core.cache import cache
+
+from foodgram import settings
+from users.models import Subscription
+from .models import Recipe
+
+FEED_KEY = 'feed:{}'
+
+
+def feed_queryset(user):
+    """Рецепты авторов, на которых подписан пользователь.
+    Один запрос по индексу (author, -pub_date, -id)."""
+
+    return Recipe.objects.filter(
+        author_id__in=Subscription.objects.filter(
+            follower=user
+        ).values('follow_id')
+    ).order_by('-pub_date', '-id')
+
+
+def cached_feed_ids(user):
+    """Id последних рецептов ленты из кэша (fan-out on write).
+    При промахе список заполняется из БД."""
+
+    key = FEED_KEY.format(user.id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = list(feed_queryset(user).values_list(
+            'id', flat=True
+        )[:settings.FEED_CACHE_SIZE])
+        cache.set(key, ids, settings.FEED_CACHE_TIMEOUT)
+    return ids
+
+
+def follower_feeds(author_id):
+    """Закэшированные ленты подписчиков автора: ключ -> список id."""
+
+    follower_ids = Subscription.objects.filter(
+        follow_id=author_id
+    ).values_list('follower_id', flat=True)
+    return cache.get_many(
+        [FEED_KEY.format(follower_id) for follower_id in follower_ids]
+    )
+
+
+def fan_out(recipe):
+    """Новый рецепт в начало закэшированных лент подписчиков автора.
+    Ленты без кэша не создаются, они заполнятся при чтении."""
+
+    cache.set_many(
+        {
+            key: [recipe.id, *ids][:settings.FEED_CACHE_SIZE]
+            for key, ids in follower_feeds(recipe.author_id).items()
+        },
+        settings.FEED_CACHE_TIMEOUT,
+    )
+
+
+def remove_from_feeds(recipe_id, author_id):
+    """Удаленный рецепт из закэшированных лент подписчиков автора."""
+
+    cache.set_many(
+        {
+            key: [pk for pk in ids if pk != recipe_id]
+            for key, ids in follower_feeds(author_id).items()
+            if recipe_id in ids
+        },
+        settings.FEED_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_feed(user_id):
+    cache.delete(FEED_KEY.format(user_id))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.snapshots import refresh_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Заполнение снимков рецептов (по умолчанию только отсутствующих).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересобрать снимки всех рецептов.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        queryset = Recipe.objects.all()
+        if not options['all']:
+            queryset = queryset.filter(snapshot__isnull=True)
+        updated = refresh_snapshots(queryset, options['batch_size'])
+        self.stdout.write(f'Updated {updated} recipes.')
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import Recipe
+from recipes.snapshots import check_snapshots, refresh_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Сверка снимков рецептов с таблицами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help='Пересобрать расходящиеся снимки.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        stale = check_snapshots(options['batch_size'])
+        if not stale:
+            self.stdout.write('All snapshots are consistent.')
+            return
+        if options['fix']:
+            updated = refresh_snapshots(
+                Recipe.objects.filter(pk__in=stale), options['batch_size']
+            )
+            self.stdout.write(f'Updated {updated} recipes.')
+            return
+        raise CommandError(
+            f'{len(stale)} stale snapshots, first ids: {stale[:20]}'
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from recipes.nutrition import catalog_stats
+
+
+class Command(BaseCommand):
+    help = 'Распределение калорийности, БЖУ и цены по всем рецептам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        for column, stats in catalog_stats(options['batch_size']).items():
+            values = ' '.join(
+                f'{key}={value:.1f}' if isinstance(value, float)
+                else f'{key}={value}'
+                for key, value in stats.items()
+            )
+            self.stdout.write(f'{column}: {values}')
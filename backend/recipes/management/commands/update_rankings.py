@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.rankings import prune_events, update_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчет рейтингов popular и trending и удаление старых событий '
+        '(запускать по cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = update_rankings(options['batch_size'])
+        self.stdout.write(f'Updated {updated} recipes.')
+        pruned = prune_events(timezone.now(), options['batch_size'])
+        self.stdout.write(f'Deleted {pruned} old events.')
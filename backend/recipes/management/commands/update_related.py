@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.related import update_related
+
+
+class Command(BaseCommand):
+    help = ('Пересчет похожих рецептов: новых и измененных '
+            'или всех (--full, запускать по cron).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true')
+        parser.add_argument('--count', type=int)
+        parser.add_argument('--chunk-size', type=int)
+        parser.add_argument('--metric', choices=('cosine', 'jaccard'))
+
+    def handle(self, *args, **options):
+        try:
+            updated = update_related(
+                full=options['full'],
+                count=options['count'],
+                chunk_size=options['chunk_size'],
+                metric=options['metric'],
+            )
+        except ImportError as exc:
+            raise CommandError(f'Нужен scipy: {exc}')
+        self.stdout.write(f'Updated {updated} recipes.')
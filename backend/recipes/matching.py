@@ -0,0 +1,186 @@
+import heapq
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import chain
+
+from django.db import connections
+
+from foodgram import settings
+from .models import RecipeIngredient
+
+
+class IngredientIndex:
+    """Инвертированный индекс ингредиент -> отсортированные id рецептов.
+    Хранится в памяти процесса в компактных массивах array('q').
+    Обновляется инкрементально при изменении рецептов в этом процессе
+    и перестраивается целиком раз в MATCHING_INDEX_TTL секунд, чтобы
+    подхватить изменения из других воркеров.
+
+    Сборка идет без блокировки, под блокировкой только замена индекса.
+    Первая сборка выполняется в вызвавшем потоке (прогрев при запуске
+    сервера, иначе первый запрос), остальные потоки ее ждут. Устаревший
+    индекс перестраивается в фоновом потоке, до замены запросы читают
+    старый. Изменения рецептов во время сборки повторяются на новом
+    индексе."""
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._built = threading.Condition(self._lock)
+        self._postings = {}
+        self._recipes = {}
+        self._built_at = None
+        self._building = False
+        # Изменения во время сборки: (recipe_id, ingredient_ids или None).
+        self._pending = []
+
+    @staticmethod
+    def load(pairs=None):
+        """Индекс по парам (ingredient_id, recipe_id).
+        По умолчанию пары читаются из RecipeIngredient."""
+
+        if pairs is None:
+            pairs = RecipeIngredient.objects.order_by(
+                'ingredient_id', 'recipe_id'
+            ).values_list('ingredient_id', 'recipe_id').iterator()
+        postings, recipes = {}, {}
+        for ingredient_id, recipe_id in pairs:
+            postings.setdefault(ingredient_id, array('q')).append(recipe_id)
+            recipes.setdefault(recipe_id, array('q')).append(ingredient_id)
+        for recipe_ids in postings.values():
+            if any(a > b for a, b in zip(recipe_ids, recipe_ids[1:])):
+                recipe_ids[:] = array('q', sorted(recipe_ids))
+        return postings, recipes
+
+    def build(self, pairs=None):
+        with self._lock:
+            self._building = True
+            self._pending = []
+        self._rebuild(pairs)
+
+    def _rebuild(self, pairs=None):
+        try:
+            postings, recipes = self.load(pairs)
+        except BaseException:
+            with self._lock:
+                self._building = False
+                self._built.notify_all()
+            raise
+        with self._lock:
+            for recipe_id, ingredient_ids in self._pending:
+                self._remove(postings, recipes, recipe_id)
+                if ingredient_ids is not None:
+                    self._insert(postings, recipes, recipe_id, ingredient_ids)
+            self._postings, self._recipes = postings, recipes
+            self._built_at = time.monotonic()
+            self._building = False
+            self._pending = []
+            self._built.notify_all()
+
+    def _refresh(self):
+        try:
+            self._rebuild()
+        finally:
+            # Соединение фонового потока иначе осталось бы открытым.
+            connections.close_all()
+
+    def ensure_fresh(self):
+        ttl = settings.MATCHING_INDEX_TTL if self.ttl is None else self.ttl
+        with self._lock:
+            while self._built_at is None and self._building:
+                self._built.wait()
+            if self._building or (
+                self._built_at is not None
+                and time.monotonic() - self._built_at <= ttl
+            ):
+                return
+            cold = self._built_at is None
+            self._building = True
+            self._pending = []
+        if cold:
+            self._rebuild()
+        else:
+            threading.Thread(target=self._refresh, daemon=True).start()
+
+    @staticmethod
+    def _remove(postings, recipes, recipe_id):
+        for ingredient_id in recipes.pop(recipe_id, ()):
+            recipe_ids = postings[ingredient_id]
+            position = bisect_left(recipe_ids, recipe_id)
+            if (
+                position < len(recipe_ids)
+                and recipe_ids[position] == recipe_id
+            ):
+                del recipe_ids[position]
+
+    @staticmethod
+    def _insert(postings, recipes, recipe_id, ingredient_ids):
+        recipes[recipe_id] = array('q', ingredient_ids)
+        for ingredient_id in ingredient_ids:
+            insort(postings.setdefault(ingredient_id, array('q')), recipe_id)
+
+    def remove_recipe(self, recipe_id):
+        with self._lock:
+            if self._building:
+                self._pending.append((recipe_id, None))
+            self._remove(self._postings, self._recipes, recipe_id)
+
+    def set_recipe(self, recipe_id, ingredient_ids):
+        with self._lock:
+            if self._building:
+                self._pending.append((recipe_id, list(ingredient_ids)))
+            if self._built_at is None:
+                return
+            self._remove(self._postings, self._recipes, recipe_id)
+            self._insert(
+                self._postings, self._recipes, recipe_id, ingredient_ids
+            )
+
+    def match(self, ingredient_ids):
+        """Рецепты, содержащие хотя бы один из ингредиентов,
+        по убыванию покрытия (совпало / всего ингредиентов)."""
+
+        self.ensure_fresh()
+        with self._lock:
+            matched = Counter(chain.from_iterable(
+                self._postings.get(ingredient_id, ())
+                for ingredient_id in set(ingredient_ids)
+            ))
+            totals = {
+                recipe_id: len(self._recipes[recipe_id])
+                for recipe_id in matched
+            }
+        return MatchResult(matched, totals)
+
+
+class MatchResult:
+    """Ленивый ранжированный список (recipe_id, совпало, всего).
+    Срез сортирует только первые stop элементов, поэтому страница
+    пагинатора не требует сортировки всех найденных рецептов."""
+
+    def __init__(self, matched, totals):
+        self.matched = matched
+        self.totals = totals
+
+    def __len__(self):
+        return len(self.matched)
+
+    def _key(self, recipe_id):
+        matched = self.matched[recipe_id]
+        return matched / self.totals[recipe_id], matched, recipe_id
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        stop = len(self) if index.stop is None else index.stop
+        top = heapq.nlargest(stop, self.matched, key=self._key)
+        return [
+            (recipe_id, self.matched[recipe_id], self.totals[recipe_id])
+            for recipe_id in top[index]
+        ]
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,38 @@
+from django.db.models import F, FloatField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import MealPlanItem, PantryItem
+
+
+def shopping_list(plan, pantry=False):
+    """Ингредиенты всех рецептов плана с учетом множителей порций.
+    Один сгруппированный запрос по MealPlanItem -> RecipeIngredient;
+    с pantry=True из количества вычитаются запасы пользователя
+    и ингредиенты, которые есть в нужном количестве, не попадают
+    в список."""
+
+    rows = MealPlanItem.objects.filter(plan=plan).values(
+        ingredient=F('recipe__recipe_ingredients__ingredient_id'),
+        name=F('recipe__recipe_ingredients__ingredient__name'),
+        measurement_unit=F(
+            'recipe__recipe_ingredients__ingredient__measurement_unit'
+        ),
+    ).annotate(
+        total=Sum(
+            F('recipe__recipe_ingredients__amount') * F('servings'),
+            output_field=FloatField(),
+        ),
+    ).filter(total__isnull=False).order_by('name')
+    if not pantry:
+        return rows.annotate(amount=F('total'))
+
+    in_pantry = PantryItem.objects.filter(
+        user=plan.user_id, ingredient=OuterRef('ingredient')
+    ).values('amount')
+    return rows.annotate(
+        in_pantry=Coalesce(
+            Subquery(in_pantry, output_field=FloatField()), Value(0.0)
+        ),
+    ).annotate(
+        amount=Greatest(F('total') - F('in_pantry'), Value(0.0)),
+    ).filter(amount__gt=0)
@@ -0,0 +1,20 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+from recipes.search import create_search_index, drop_search_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_rename_recipeingredients_recipeingredient_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_recipe_popularity_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'Добавлен в избранное'), (2, 'Удален из избранного'), (3, 'Добавлен в корзину'), (4, 'Удален из корзины'), (5, 'Подписка'), (6, 'Отписка')], verbose_name='Событие')),
+                ('user_id', models.BigIntegerField(verbose_name='Пользователь')),
+                ('target_id', models.BigIntegerField(verbose_name='Рецепт или автор')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время')),
+            ],
+            options={
+                'verbose_name': 'Событие',
+                'verbose_name_plural': 'События',
+                'indexes': [models.Index(fields=['created'], name='event_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_activityevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='snapshot',
+            field=models.JSONField(editable=False, null=True, verbose_name='Снимок ответа API'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_recipe_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='related',
+            field=models.BinaryField(editable=False, null=True, verbose_name='Похожие рецепты'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='related_stale',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Похожие рецепты устарели'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(condition=models.Q(('related_stale', True)), fields=['id'], name='recipe_related_stale_idx'),
+        ),
+    ]
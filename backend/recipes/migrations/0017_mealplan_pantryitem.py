@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingredients', '0003_nutrition'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0016_recipe_related'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MealPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Название')),
+                ('start_date', models.DateField(verbose_name='Первый день')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meal_plans', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'План питания',
+                'verbose_name_plural': 'Планы питания',
+                'ordering': ['-start_date', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MealPlanItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.PositiveSmallIntegerField(verbose_name='День')),
+                ('servings', models.FloatField(default=1, verbose_name='Множитель порций')),
+                ('plan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='recipes.mealplan', verbose_name='План')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='meal_plan_items', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Рецепт в плане',
+                'verbose_name_plural': 'Рецепты в плане',
+                'ordering': ['day', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PantryItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveIntegerField(verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pantry_items', to='ingredients.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pantry', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Запас',
+                'verbose_name_plural': 'Запасы',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='mealplanitem',
+            constraint=models.UniqueConstraint(fields=('plan', 'recipe', 'day'), name='unique_meal_plan_item'),
+        ),
+        migrations.AddConstraint(
+            model_name='pantryitem',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_pantry_item'),
+        ),
+    ]
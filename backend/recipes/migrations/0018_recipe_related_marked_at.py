@@ -0,0 +1,18 @@
+# Generated by Django 4.2.3 on 2026-10-19 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0017_mealplan_pantryitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='related_marked_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Отмечен для пересчета похожих'),
+        ),
+    ]
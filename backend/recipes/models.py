@@ -1,5 +1,7 @@
 from colorfield.fields import ColorField
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 
 from ingredients.models import Ingredient
 from users.models import User
@@ -88,11 +90,69 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Дата публикации',
     )
+    search_vector = SearchVectorField(
+        'Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+    popularity = models.PositiveIntegerField(
+        'Добавлений в избранное',
+        default=0,
+        editable=False,
+    )
+    trending = models.FloatField(
+        'Рейтинг трендов',
+        default=0,
+        editable=False,
+    )
+    snapshot = models.JSONField(
+        'Снимок ответа API',
+        null=True,
+        editable=False,
+    )
+    related = models.BinaryField(
+        'Похожие рецепты',
+        null=True,
+        editable=False,
+    )
+    related_stale = models.BooleanField(
+        'Похожие рецепты устарели',
+        default=True,
+        editable=False,
+    )
+    related_marked_at = models.DateTimeField(
+        'Отмечен для пересчета похожих',
+        null=True,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_idx',
+            ),
+            models.Index(
+                fields=['-popularity', '-pub_date', '-id'],
+                name='recipe_popularity_idx',
+            ),
+            models.Index(
+                fields=['-trending', '-pub_date', '-id'],
+                name='recipe_trending_idx',
+            ),
+            models.Index(
+                fields=['id'],
+                condition=models.Q(related_stale=True),
+                name='recipe_related_stale_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -131,3 +191,124 @@ class RecipeIngredient(models.Model):
                 name='unique_recipe_ingredient',
             )
         ]
+
+
+class ActivityEvent(models.Model):
+    """Журнал действий пользователей, только добавление записей.
+    Без внешних ключей, чтобы пакетная вставка не проверяла связи."""
+
+    FAVORITE_ADD = 1
+    FAVORITE_REMOVE = 2
+    CART_ADD = 3
+    CART_REMOVE = 4
+    SUBSCRIBE = 5
+    UNSUBSCRIBE = 6
+    KINDS = (
+        (FAVORITE_ADD, 'Добавлен в избранное'),
+        (FAVORITE_REMOVE, 'Удален из избранного'),
+        (CART_ADD, 'Добавлен в корзину'),
+        (CART_REMOVE, 'Удален из корзины'),
+        (SUBSCRIBE, 'Подписка'),
+        (UNSUBSCRIBE, 'Отписка'),
+    )
+
+    kind = models.PositiveSmallIntegerField('Событие', choices=KINDS)
+    user_id = models.BigIntegerField('Пользователь')
+    target_id = models.BigIntegerField('Рецепт или автор')
+    created = models.DateTimeField('Время', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Событие'
+        verbose_name_plural = 'События'
+        indexes = [
+            models.Index(fields=['created'], name='event_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()}: {self.user_id} -> {self.target_id}'
+
+
+class MealPlan(models.Model):
+    """План питания пользователя на неделю."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='meal_plans',
+        verbose_name='Пользователь',
+    )
+    name = models.CharField('Название', max_length=200)
+    start_date = models.DateField('Первый день')
+
+    class Meta:
+        verbose_name = 'План питания'
+        verbose_name_plural = 'Планы питания'
+        ordering = ['-start_date', '-id']
+
+    def __str__(self):
+        return f'{self.name} ({self.start_date})'
+
+
+class MealPlanItem(models.Model):
+    """Рецепт в плане: день недели (0 - первый день плана)
+    и множитель порций."""
+
+    plan = models.ForeignKey(
+        MealPlan,
+        on_delete=models.CASCADE,
+        related_name='items',
+        verbose_name='План',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='meal_plan_items',
+        verbose_name='Рецепт',
+    )
+    day = models.PositiveSmallIntegerField('День')
+    servings = models.FloatField('Множитель порций', default=1)
+
+    class Meta:
+        verbose_name = 'Рецепт в плане'
+        verbose_name_plural = 'Рецепты в плане'
+        ordering = ['day', 'id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['plan', 'recipe', 'day'],
+                name='unique_meal_plan_item',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.plan}: {self.recipe} x{self.servings}'
+
+
+class PantryItem(models.Model):
+    """Запас ингредиента у пользователя, вычитается из списка покупок."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='pantry',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='pantry_items',
+        verbose_name='Ингредиент',
+    )
+    amount = models.PositiveIntegerField('Количество')
+
+    class Meta:
+        verbose_name = 'Запас'
+        verbose_name_plural = 'Запасы'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_pantry_item',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user}: {self.ingredient} {self.amount}'
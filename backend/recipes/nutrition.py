@@ -0,0 +1,195 @@
+import threading
+import time
+from array import array
+
+import numpy as np
+
+from foodgram import settings
+from ingredients.models import Nutrition
+from .models import RecipeIngredient
+
+# Итоговые показатели; в таблице Nutrition они заданы на 100 г.
+COLUMNS = ('calories', 'proteins', 'fats', 'carbohydrates', 'price')
+
+# Масса единицы измерения в граммах (для жидкостей плотность 1 г/мл).
+# Для штучных единиц массу задает Nutrition.unit_grams.
+UNIT_GRAMS = {
+    'г': 1,
+    'кг': 1000,
+    'мл': 1,
+    'л': 1000,
+    'ст. л.': 15,
+    'ч. л.': 5,
+    'стакан': 200,
+    'щепотка': 0.5,
+    'капля': 0.05,
+    'по вкусу': 0,
+}
+
+
+class NutritionTable:
+    """Коэффициенты показателей на единицу measurement_unit ингредиента.
+    Хранятся в памяти процесса матрицей (ингредиенты x COLUMNS) с
+    отсортированными id ингредиентов и перестраиваются раз в
+    NUTRITION_TABLE_TTL секунд. Неизвестная цена - NaN."""
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._ids = np.empty(0, dtype=np.int64)
+        self._coefficients = np.empty((0, len(COLUMNS)))
+        self._built_at = None
+
+    def build(self, rows=None):
+        """Построение по строкам (ingredient_id, measurement_unit,
+        unit_grams, *COLUMNS). По умолчанию строки читаются из Nutrition.
+        Ингредиенты с неизвестной массой единицы пропускаются."""
+
+        if rows is None:
+            rows = Nutrition.objects.order_by('ingredient_id').values_list(
+                'ingredient_id', 'ingredient__measurement_unit',
+                'unit_grams', *COLUMNS,
+            )
+        ids, coefficients = array('q'), array('d')
+        for ingredient_id, unit, unit_grams, *values in rows:
+            grams = unit_grams if unit_grams is not None else UNIT_GRAMS.get(
+                unit
+            )
+            if grams is None:
+                continue
+            ids.append(ingredient_id)
+            coefficients.extend(
+                np.nan if value is None else value * grams / 100
+                for value in values
+            )
+        ids = np.array(ids, dtype=np.int64)
+        coefficients = np.array(coefficients).reshape(-1, len(COLUMNS))
+        order = np.argsort(ids, kind='stable')
+        with self._lock:
+            self._ids, self._coefficients = ids[order], coefficients[order]
+            self._built_at = time.monotonic()
+
+    def ensure_fresh(self):
+        ttl = settings.NUTRITION_TABLE_TTL if self.ttl is None else self.ttl
+        if self._built_at is None or time.monotonic() - self._built_at > ttl:
+            self.build()
+
+    def invalidate(self):
+        self._built_at = None
+
+    def coefficients(self, ingredient_ids):
+        """Коэффициенты для массива id и маска ингредиентов с данными."""
+
+        self.ensure_fresh()
+        with self._lock:
+            ids, coefficients = self._ids, self._coefficients
+        if not len(ids):
+            return (
+                np.zeros((len(ingredient_ids), len(COLUMNS))),
+                np.zeros(len(ingredient_ids), dtype=bool),
+            )
+        positions = np.minimum(
+            np.searchsorted(ids, ingredient_ids), len(ids) - 1
+        )
+        known = ids[positions] == ingredient_ids
+        return coefficients[positions], known
+
+    def totals(self, groups, ingredient_ids, amounts, size):
+        """Суммы COLUMNS по группам (рецептам) для строк
+        (группа 0..size-1, ингредиент, количество).
+        Возвращает матрицу (size x COLUMNS) и маску строк без данных.
+        Сумма столбца, в котором нет ни одного известного значения, - NaN."""
+
+        coefficients, known = self.coefficients(ingredient_ids)
+        values = amounts[:, None] * coefficients
+        values[~known] = np.nan
+        present = ~np.isnan(values)
+        totals = np.empty((size, len(COLUMNS)))
+        for column in range(len(COLUMNS)):
+            totals[:, column] = np.bincount(
+                groups, weights=np.where(present[:, column],
+                                         values[:, column], 0),
+                minlength=size,
+            )
+            counted = np.bincount(
+                groups, weights=present[:, column], minlength=size
+            )
+            totals[counted == 0, column] = np.nan
+        return totals, ~known
+
+
+def as_arrays(rows):
+    """Столбцы (recipe_id, ingredient_id, amount) в массивы NumPy."""
+
+    recipe_ids, ingredient_ids, amounts = array('q'), array('q'), array('d')
+    for recipe_id, ingredient_id, amount in rows:
+        recipe_ids.append(recipe_id)
+        ingredient_ids.append(ingredient_id)
+        amounts.append(amount)
+    return (
+        np.array(recipe_ids, dtype=np.int64),
+        np.array(ingredient_ids, dtype=np.int64),
+        np.array(amounts),
+    )
+
+
+def as_dict(totals):
+    return {
+        column: None if np.isnan(value) else round(float(value), 1)
+        for column, value in zip(COLUMNS, totals)
+    }
+
+
+def recipe_totals(queryset):
+    """Показатели рецептов queryset и корзины в целом.
+    Одно чтение RecipeIngredient и векторные суммы по рецептам."""
+
+    recipe_ids, ingredient_ids, amounts = as_arrays(
+        RecipeIngredient.objects.filter(recipe__in=queryset).values_list(
+            'recipe_id', 'ingredient_id', 'amount'
+        ).iterator()
+    )
+    recipes, groups = np.unique(recipe_ids, return_inverse=True)
+    per_recipe, missing = nutrition_table.totals(
+        groups, ingredient_ids, amounts, len(recipes)
+    )
+    total, _ = nutrition_table.totals(
+        np.zeros(len(groups), dtype=np.int64), ingredient_ids, amounts, 1
+    )
+    return {
+        'total': as_dict(total[0]),
+        'recipes': [
+            dict(id=int(recipe_id), **as_dict(row))
+            for recipe_id, row in zip(recipes, per_recipe)
+        ],
+        'missing': sorted(set(ingredient_ids[missing].tolist())),
+    }
+
+
+def catalog_stats(batch_size=100000, percentiles=(50, 90, 99)):
+    """Распределение показателей по всем рецептам каталога:
+    среднее и процентили по рецептам, у которых показатель известен."""
+
+    rows = RecipeIngredient.objects.values_list(
+        'recipe_id', 'ingredient_id', 'amount'
+    ).iterator(chunk_size=batch_size)
+    recipe_ids, ingredient_ids, amounts = as_arrays(rows)
+    recipes, groups = np.unique(recipe_ids, return_inverse=True)
+    totals, _ = nutrition_table.totals(
+        groups, ingredient_ids, amounts, len(recipes)
+    )
+    stats = {}
+    for column, values in zip(COLUMNS, totals.T):
+        values = values[~np.isnan(values)]
+        stats[column] = {'recipes': len(values)}
+        if len(values):
+            stats[column]['mean'] = float(values.mean())
+            stats[column].update(
+                (f'p{q}', float(value)) for q, value in zip(
+                    percentiles, np.percentile(values, percentiles)
+                )
+            )
+    return stats
+
+
+nutrition_table = NutritionTable()
@@ -0,0 +1,79 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Count
+from django.utils import timezone
+
+from foodgram import settings
+from .models import ActivityEvent, Recipe
+
+ORDERINGS = {
+    'popular': ('-popularity', '-pub_date', '-id'),
+    'trending': ('-trending', '-pub_date', '-id'),
+}
+
+# Вклад события в рейтинг trending до затухания.
+TRENDING_WEIGHTS = {
+    ActivityEvent.FAVORITE_ADD: 1.0,
+    ActivityEvent.FAVORITE_REMOVE: -1.0,
+    ActivityEvent.CART_ADD: settings.RANKING_CART_WEIGHT,
+    ActivityEvent.CART_REMOVE: -settings.RANKING_CART_WEIGHT,
+}
+
+
+def trending_scores(now):
+    """Рейтинг trending из журнала событий за RANKING_WINDOW_HOURS.
+    Вклад события затухает экспоненциально с периодом полураспада
+    RANKING_HALF_LIFE_HOURS."""
+
+    decay = math.log(2) / settings.RANKING_HALF_LIFE_HOURS
+    events = ActivityEvent.objects.filter(
+        kind__in=TRENDING_WEIGHTS,
+        created__gte=now - timedelta(hours=settings.RANKING_WINDOW_HOURS),
+    ).values_list('kind', 'target_id', 'created')
+    scores = defaultdict(float)
+    for kind, target_id, created in events.iterator(chunk_size=10000):
+        age_hours = (now - created).total_seconds() / 3600
+        scores[target_id] += TRENDING_WEIGHTS[kind] * math.exp(
+            -decay * age_hours
+        )
+    return scores
+
+
+def prune_events(now, batch_size=1000):
+    """Удаление событий старше EVENT_RETENTION_HOURS пачками по
+    batch_size по индексу created. Число удаленных событий."""
+
+    expired = ActivityEvent.objects.filter(
+        created__lt=now - timedelta(hours=settings.EVENT_RETENTION_HOURS)
+    )
+    deleted = 0
+    while True:
+        ids = list(expired.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += ActivityEvent.objects.filter(id__in=ids).delete()[0]
+
+
+def update_rankings(batch_size=1000):
+    """Пересчет popularity и trending для всех рецептов.
+    popularity сверяется с таблицей избранного, исправляя расхождения
+    инкрементальных обновлений. Возвращает число обновленных рецептов."""
+
+    now = timezone.now()
+    scores = trending_scores(now)
+    rows = Recipe.objects.annotate(
+        favorites=Count('favorite'),
+    ).order_by().values_list('id', 'favorites', 'popularity', 'trending')
+    changed = []
+    for pk, favorites, popularity, trending in rows.iterator(
+        chunk_size=batch_size
+    ):
+        score = max(scores.get(pk, 0.0), 0.0)
+        if popularity != favorites or trending != score:
+            changed.append(Recipe(id=pk, popularity=favorites, trending=score))
+    Recipe.objects.bulk_update(
+        changed, ('popularity', 'trending'), batch_size=batch_size
+    )
+    return len(changed)
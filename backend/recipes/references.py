@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from foodgram import settings
+from .models import Ingredient, Tag
+
+VERSION_KEY = 'references:{}:version'
+ITEM_KEY = 'references:{}:{}:{}'
+
+
+class ReferenceCache:
+    """id -> объект справочника (ингредиенты, теги) для записи рецептов.
+    Уровни: LRU процесса, общий кэш Django, база. Изменение справочника
+    меняет версию в кэше Django, после чего записи прежней версии
+    не используются ни одним процессом. Записи LRU живут не дольше
+    local_ttl секунд. Без общего кэша (SHARED_CACHE) версия видна
+    только одному воркеру, поэтому объекты читаются из базы."""
+
+    def __init__(self, model, maxsize, timeout, local_ttl):
+        self.model = model
+        self.label = model._meta.label_lower
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.local_ttl = local_ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+
+    def version(self):
+        key = VERSION_KEY.format(self.label)
+        version = cache.get(key)
+        if version is None:
+            version = time.time_ns()
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+        return version
+
+    def get_many(self, ids):
+        """Словарь id -> объект. Несуществующие id в нем отсутствуют."""
+
+        ids = set(ids)
+        if not settings.SHARED_CACHE:
+            return self.model.objects.in_bulk(ids)
+        version = self.version()
+        found = {}
+        expired = time.monotonic() - self.local_ttl
+        with self._lock:
+            if self._version != version:
+                self._entries.clear()
+                self._version = version
+            for pk in ids:
+                entry = self._entries.get(pk)
+                if entry is None:
+                    continue
+                obj, cached_at = entry
+                if cached_at < expired:
+                    del self._entries[pk]
+                    continue
+                self._entries.move_to_end(pk)
+                found[pk] = obj
+        missing = ids - found.keys()
+        if not missing:
+            return found
+
+        keys = {ITEM_KEY.format(self.label, version, pk): pk for pk in missing}
+        loaded = {keys[key]: obj for key, obj in cache.get_many(keys).items()}
+        missing -= loaded.keys()
+        if missing:
+            from_db = self.model.objects.in_bulk(missing)
+            cache.set_many({
+                ITEM_KEY.format(self.label, version, pk): obj
+                for pk, obj in from_db.items()
+            }, self.timeout)
+            loaded.update(from_db)
+
+        cached_at = time.monotonic()
+        with self._lock:
+            if self._version == version:
+                self._entries.update(
+                    (pk, (obj, cached_at)) for pk, obj in loaded.items()
+                )
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        found.update(loaded)
+        return found
+
+    def invalidate(self):
+        cache.set(VERSION_KEY.format(self.label), time.time_ns(), None)
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+
+ingredient_cache = ReferenceCache(
+    Ingredient, settings.REFERENCE_CACHE_SIZE,
+    settings.REFERENCE_CACHE_TIMEOUT, settings.REFERENCE_CACHE_LOCAL_TTL,
+)
+tag_cache = ReferenceCache(
+    Tag, settings.REFERENCE_CACHE_SIZE,
+    settings.REFERENCE_CACHE_TIMEOUT, settings.REFERENCE_CACHE_LOCAL_TTL,
+)
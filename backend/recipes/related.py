@@ -0,0 +1,250 @@
+import numpy as np
+from django.db.models import Q
+from django.utils import timezone
+
+from foodgram import settings
+from .models import Recipe, RecipeIngredient
+
+# Список похожих рецептов хранится в Recipe.related упакованными парами
+# (id, сходство): 12 байт на соседа.
+NEIGHBOUR_DTYPE = np.dtype([('id', '<i8'), ('score', '<f4')])
+
+
+def pack(ids, scores):
+    neighbours = np.empty(len(ids), dtype=NEIGHBOUR_DTYPE)
+    neighbours['id'], neighbours['score'] = ids, scores
+    return neighbours.tobytes()
+
+
+def unpack(data):
+    if not data:
+        return np.empty(0, dtype=NEIGHBOUR_DTYPE)
+    return np.frombuffer(bytes(data), dtype=NEIGHBOUR_DTYPE)
+
+
+def related_ids(recipe):
+    """Id похожих рецептов по убыванию сходства."""
+
+    return unpack(recipe.related)['id'].tolist()
+
+
+def feature_matrix(ingredient_pairs=None, tag_pairs=None, metric=None):
+    """Рецепты как разреженные векторы ингредиентов и тегов (CSR).
+    Пары (recipe_id, ingredient_id) и (recipe_id, tag_id) по умолчанию
+    читаются из базы. Для cosine признаки взвешены по IDF, теги - еще и
+    RELATED_TAG_WEIGHT, строки нормированы; для jaccard векторы бинарные.
+    Признаки, встречающиеся чаще чем в доле RELATED_MAX_DF рецептов
+    (соль, сахар), не учитываются.
+    Возвращает отсортированные id рецептов и матрицу."""
+
+    # scipy нужен только для построения индекса командой update_related.
+    from scipy import sparse
+
+    metric = metric or settings.RELATED_METRIC
+    if ingredient_pairs is None:
+        ingredient_pairs = RecipeIngredient.objects.values_list(
+            'recipe_id', 'ingredient_id'
+        ).iterator()
+    if tag_pairs is None:
+        tag_pairs = Recipe.tags.through.objects.values_list(
+            'recipe_id', 'tag_id'
+        ).iterator()
+    ingredients = np.array(
+        list(ingredient_pairs), dtype=np.int64
+    ).reshape(-1, 2)
+    tags = np.array(list(tag_pairs), dtype=np.int64).reshape(-1, 2)
+
+    recipe_ids, rows = np.unique(
+        np.concatenate([ingredients[:, 0], tags[:, 0]]), return_inverse=True
+    )
+    _, ingredient_columns = np.unique(ingredients[:, 1], return_inverse=True)
+    _, tag_columns = np.unique(tags[:, 1], return_inverse=True)
+    ingredient_count = ingredient_columns.max(initial=-1) + 1
+    columns = np.concatenate([ingredient_columns,
+                              tag_columns + ingredient_count])
+    matrix = sparse.csr_matrix(
+        (np.ones(len(columns), dtype=np.float32), (rows, columns)),
+        shape=(len(recipe_ids), columns.max(initial=-1) + 1),
+    )
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    if not len(recipe_ids):
+        return recipe_ids, matrix
+
+    frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    keep = frequency <= settings.RELATED_MAX_DF * len(recipe_ids)
+    matrix = matrix @ sparse.diags(keep.astype(np.float32))
+    matrix.eliminate_zeros()
+    if metric == 'jaccard':
+        return recipe_ids, matrix.tocsr()
+
+    weights = np.log(len(recipe_ids) / np.maximum(frequency, 1)) + 1
+    weights[ingredient_count:] *= settings.RELATED_TAG_WEIGHT
+    matrix = (matrix @ sparse.diags(weights.astype(np.float32))).tocsr()
+    norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+    norms[norms == 0] = 1
+    return recipe_ids, (sparse.diags(1 / norms) @ matrix).tocsr()
+
+
+def similarities(matrix, rows, metric=None):
+    """Сходство рецептов rows со всеми рецептами: разреженная матрица
+    (len(rows) x рецепты). Нули - рецепты без общих признаков."""
+
+    metric = metric or settings.RELATED_METRIC
+    chunk = (matrix[rows] @ matrix.T).tocsr()
+    if metric == 'jaccard':
+        sizes = np.diff(matrix.indptr)
+        chunk_rows = np.repeat(np.arange(len(rows)), np.diff(chunk.indptr))
+        union = sizes[rows][chunk_rows] + sizes[chunk.indices] - chunk.data
+        chunk.data = chunk.data / union
+    return chunk
+
+
+def top_neighbours(chunk, row, position, count):
+    """count наибольших значений строки row (без самого рецепта)."""
+
+    start, stop = chunk.indptr[row], chunk.indptr[row + 1]
+    columns, scores = chunk.indices[start:stop], chunk.data[start:stop]
+    other = columns != position
+    columns, scores = columns[other], scores[other]
+    if len(scores) > count:
+        best = np.argpartition(scores, -count)[-count:]
+        columns, scores = columns[best], scores[best]
+    order = np.argsort(-scores, kind='stable')
+    return columns[order], scores[order]
+
+
+def merge_neighbour(neighbour_list, recipe_id, score, count):
+    """Список с рецептом recipe_id на месте по сходству score,
+    не длиннее count."""
+
+    merged = np.concatenate([
+        neighbour_list[neighbour_list['id'] != recipe_id],
+        np.array([(recipe_id, score)], dtype=NEIGHBOUR_DTYPE),
+    ])
+    return merged[np.argsort(-merged['score'], kind='stable')][:count]
+
+
+def add_to_neighbour_lists(recipe_ids, chunk, rows, skip, count,
+                           batch_size):
+    """Рецепты блока rows в списках тех рецептов, где сходство выше
+    последнего соседа. Списки читаются из базы пачками по batch_size
+    и только для рецептов с ненулевым сходством с блоком; позиции skip
+    (пересчитываемые целиком) не трогаются. id -> новый список."""
+
+    columns = np.unique(chunk.indices)
+    columns = columns[~np.isin(columns, skip)]
+    ids = recipe_ids[columns].tolist()
+    stored = {}
+    for start in range(0, len(ids), batch_size):
+        stored.update(Recipe.objects.filter(
+            id__in=ids[start:start + batch_size]
+        ).values_list('id', 'related'))
+    current = {
+        position: unpack(stored.get(pk))
+        for position, pk in zip(columns.tolist(), ids)
+    }
+    # Сходство, которое нужно превысить, чтобы попасть в чужой список.
+    thresholds = np.full(len(recipe_ids), np.inf)
+    for position, neighbour_list in current.items():
+        thresholds[position] = (
+            neighbour_list['score'][-1] if len(neighbour_list) >= count
+            else -np.inf
+        )
+
+    changed = set()
+    for row, position in enumerate(rows):
+        recipe_id = int(recipe_ids[position])
+        start, stop = chunk.indptr[row], chunk.indptr[row + 1]
+        others, scores = chunk.indices[start:stop], chunk.data[start:stop]
+        better = scores > thresholds[others]
+        for other, score in zip(others[better], scores[better]):
+            current[other] = merge_neighbour(
+                current[other], recipe_id, score, count
+            )
+            if len(current[other]) >= count:
+                thresholds[other] = current[other]['score'][-1]
+            changed.add(other)
+    return {
+        int(recipe_ids[position]): current[position].tobytes()
+        for position in changed
+    }
+
+
+def clear_stale(ids, started, batch_size):
+    """Снимает related_stale, кроме рецептов, измененных после started:
+    их список посчитан по старым данным и остается в очереди."""
+
+    for start in range(0, len(ids), batch_size):
+        Recipe.objects.filter(
+            Q(related_marked_at__isnull=True)
+            | Q(related_marked_at__lte=started),
+            id__in=ids[start:start + batch_size],
+        ).update(related_stale=False)
+
+
+def update_related(full=False, count=None, chunk_size=None, metric=None,
+                   batch_size=1000):
+    """Пересчет похожих рецептов. Число обновленных рецептов.
+
+    full=True - для всех рецептов. Иначе только для отмеченных
+    related_stale (новых и измененных): их списки считаются заново,
+    а сами они добавляются в списки тех рецептов, где сходство выше
+    последнего соседа. Устаревшие значения в чужих списках исправляет
+    периодический полный пересчет.
+
+    Рецепты обрабатываются блоками по chunk_size: сходство, чтение
+    чужих списков и запись - для одного блока, поэтому память
+    ограничена блоком, а не всеми списками related."""
+
+    count = count or settings.RELATED_RECIPES_COUNT
+    chunk_size = chunk_size or settings.RELATED_CHUNK_SIZE
+    started = timezone.now()
+    stale = list(Recipe.objects.filter(
+        related_stale=True
+    ).values_list('id', flat=True).iterator())
+    recipe_ids, matrix = feature_matrix(metric=metric)
+    if full:
+        positions = np.arange(len(recipe_ids))
+    else:
+        positions = np.nonzero(np.isin(recipe_ids, stale))[0]
+
+    updated = set()
+    for start in range(0, len(positions), chunk_size):
+        rows = positions[start:start + chunk_size]
+        chunk = similarities(matrix, rows, metric)
+        lists = {}
+        for row, position in enumerate(rows):
+            columns, scores = top_neighbours(chunk, row, position, count)
+            lists[int(recipe_ids[position])] = pack(
+                recipe_ids[columns], scores
+            )
+        Recipe.objects.bulk_update(
+            [
+                Recipe(id=recipe_id, related=related)
+                for recipe_id, related in lists.items()
+            ],
+            ['related'],
+            batch_size=batch_size,
+        )
+        clear_stale(list(lists), started, batch_size)
+        updated.update(lists)
+        if full:
+            continue
+        # Следующие блоки читают уже обновленные списки из базы.
+        others = add_to_neighbour_lists(
+            recipe_ids, chunk, rows, positions, count, batch_size
+        )
+        Recipe.objects.bulk_update(
+            [
+                Recipe(id=recipe_id, related=related)
+                for recipe_id, related in others.items()
+            ],
+            ['related'],
+            batch_size=batch_size,
+        )
+        updated.update(others)
+
+    # Отмеченные рецепты без ингредиентов и тегов.
+    clear_stale(sorted(set(stale) - updated), started, batch_size)
+    return len(updated)
@@ -0,0 +1,168 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'russian'
+
+# Поиск SQLite через FTS5: таблица и триггеры создаются миграцией 0011.
+# Миграции, пересоздающие recipes_recipe (AddField с default), удаляют
+# триггеры, их восстанавливает restore_sqlite_triggers после migrate.
+SQLITE_FTS_TABLE = 'recipes_recipe_fts'
+SQLITE_TRIGGERS = (
+    'recipes_recipe_fts_insert',
+    'recipes_recipe_fts_delete',
+    'recipes_recipe_fts_update',
+)
+
+POSTGRES_SEARCH_SQL = (
+    f'''
+    CREATE OR REPLACE FUNCTION recipes_recipe_search_update()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector(
+                '{SEARCH_CONFIG}', coalesce(NEW.name, '')), 'A')
+            || setweight(to_tsvector(
+                '{SEARCH_CONFIG}', coalesce(NEW.text, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    ''',
+    '''
+    CREATE TRIGGER recipes_recipe_search_update
+    BEFORE INSERT OR UPDATE OF name, text ON recipes_recipe
+    FOR EACH ROW EXECUTE FUNCTION recipes_recipe_search_update()
+    ''',
+    '''
+    CREATE INDEX IF NOT EXISTS recipes_recipe_search_gin
+    ON recipes_recipe USING GIN (search_vector)
+    ''',
+    'UPDATE recipes_recipe SET name = name',
+)
+
+POSTGRES_DROP_SQL = (
+    'DROP TRIGGER IF EXISTS recipes_recipe_search_update ON recipes_recipe',
+    'DROP FUNCTION IF EXISTS recipes_recipe_search_update()',
+    'DROP INDEX IF EXISTS recipes_recipe_search_gin',
+)
+
+SQLITE_SEARCH_SQL = (
+    f'''
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+        name, text, content='recipes_recipe', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_insert
+    AFTER INSERT ON recipes_recipe BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_delete
+    AFTER DELETE ON recipes_recipe BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS recipes_recipe_fts_update
+    AFTER UPDATE OF name, text ON recipes_recipe BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    ''',
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')",
+)
+
+SQLITE_DROP_SQL = tuple(
+    f'DROP TRIGGER IF EXISTS {trigger}' for trigger in SQLITE_TRIGGERS
+) + (f'DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}',)
+
+SEARCH_SQL = {
+    'postgresql': (POSTGRES_SEARCH_SQL, POSTGRES_DROP_SQL),
+    'sqlite': (SQLITE_SEARCH_SQL, SQLITE_DROP_SQL),
+}
+
+
+def fts5_query(query):
+    """Слова запроса в кавычках, чтобы спецсимволы FTS5 не ломали MATCH."""
+
+    return ' '.join(
+        '"{}"'.format(word.replace('"', '""')) for word in query.split()
+    )
+
+
+def search_recipes(queryset, query):
+    """Полнотекстовый поиск по названию и описанию рецепта.
+    Результат аннотирован rank и упорядочен по релевантности."""
+
+    query = query.strip()
+    if not query:
+        return queryset
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'postgresql':
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        queryset = queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        )
+    elif vendor == 'sqlite':
+        match = fts5_query(query)
+        queryset = queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {SQLITE_FTS_TABLE} '
+            f'WHERE {SQLITE_FTS_TABLE} MATCH %s',
+            (match,),
+        )).annotate(rank=RawSQL(
+            f'SELECT -bm25({SQLITE_FTS_TABLE}, 10.0, 1.0) '
+            f'FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s '
+            f'AND rowid = recipes_recipe.id',
+            (match,),
+            output_field=FloatField(),
+        ))
+    else:
+        return queryset.filter(Q(name__icontains=query)
+                               | Q(text__icontains=query))
+    return queryset.order_by('-rank', '-pub_date')
+
+
+def create_search_index(apps, schema_editor):
+    create, _ = SEARCH_SQL.get(schema_editor.connection.vendor, ((), ()))
+    for statement in create:
+        schema_editor.execute(statement)
+
+
+def restore_sqlite_triggers(using='default', **kwargs):
+    """Получатель post_migrate: на SQLite пересоздает потерянные
+    триггеры FTS5 и перестраивает индекс по таблице рецептов.
+    До миграции 0011 (таблицы FTS5 нет) ничего не делает."""
+
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            (SQLITE_FTS_TABLE,) + SQLITE_TRIGGERS,
+        )
+        existing = {name for name, in cursor.fetchall()}
+        if (
+            SQLITE_FTS_TABLE not in existing
+            or existing.issuperset(SQLITE_TRIGGERS)
+        ):
+            return
+        for statement in SQLITE_SEARCH_SQL:
+            cursor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    _, drop = SEARCH_SQL.get(schema_editor.connection.vendor, ((), ()))
+    for statement in drop:
+        schema_editor.execute(statement)
@@ -0,0 +1,159 @@
+from functools import partial
+
+from django.core.signals import request_finished
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from foodgram import settings
+from ingredients.models import Nutrition
+from users.models import Subscription, User
+from .feed import fan_out, invalidate_feed, remove_from_feeds
+from .events import event_buffer
+from .matching import ingredient_index
+from .nutrition import nutrition_table
+from .models import Ingredient, Recipe, Tag
+from .references import ingredient_cache, tag_cache
+from .snapshots import AUTHOR_FIELDS, store_snapshot
+
+# Отправляется после записи ингредиентов и тегов рецепта
+# (bulk_create не вызывает post_save для RecipeIngredient).
+# Аргументы: instance, ingredient_ids.
+recipe_ingredients_changed = Signal()
+
+
+# Индекс в памяти процесса меняется только после фиксации транзакции,
+# иначе откат оставил бы в нем несуществующие данные.
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def update_ingredient_index(sender, instance, ingredient_ids, **kwargs):
+    transaction.on_commit(partial(
+        ingredient_index.set_recipe, instance.id, list(ingredient_ids)
+    ))
+
+
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def update_snapshot(sender, instance, **kwargs):
+    """Снимок собирается после фиксации: из зафиксированных строк и без
+    лишних запросов внутри транзакции записи."""
+
+    transaction.on_commit(partial(store_snapshot, instance))
+
+
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def mark_related_stale(sender, instance, **kwargs):
+    """Время отметки обновляется при каждой правке: update_related
+    снимает отметку, только если она поставлена до начала пересчета."""
+
+    instance.related_stale, instance.related_marked_at = True, timezone.now()
+    Recipe.objects.filter(pk=instance.pk).update(
+        related_stale=True, related_marked_at=instance.related_marked_at
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_from_ingredient_index(sender, instance, **kwargs):
+    transaction.on_commit(partial(
+        ingredient_index.remove_recipe, instance.id
+    ))
+
+
+# Ленты меняются только после фиксации транзакции: при откате
+# в них не должно остаться id несуществующего рецепта.
+@receiver(post_save, sender=Recipe)
+def fan_out_feed(sender, instance, created, **kwargs):
+    if created and settings.FEED_FANOUT:
+        transaction.on_commit(partial(fan_out, instance))
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_from_follower_feeds(sender, instance, **kwargs):
+    if settings.FEED_FANOUT:
+        transaction.on_commit(partial(
+            remove_from_feeds, instance.id, instance.author_id
+        ))
+
+
+# Срабатывают и при правке в админке, и при загрузке справочников
+# командой loaddata. Версия кэша меняется после фиксации: иначе другой
+# процесс успел бы закэшировать под новой версией старые строки.
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_cache(sender, **kwargs):
+    transaction.on_commit(ingredient_cache.invalidate)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_cache(sender, **kwargs):
+    transaction.on_commit(tag_cache.invalidate)
+
+
+@receiver(post_save, sender=Nutrition)
+@receiver(post_delete, sender=Nutrition)
+def invalidate_nutrition_table(sender, **kwargs):
+    # Иначе перестройка до фиксации прочитала бы старые данные.
+    transaction.on_commit(nutrition_table.invalidate)
+
+
+# Снимки рецептов, которых касается изменение тега, ингредиента
+# или автора, сбрасываются одним UPDATE и отдаются из таблиц до
+# backfill_snapshots. UPDATE выполняется в транзакции изменения и
+# откатывается вместе с ней, поэтому on_commit здесь не нужен.
+# Удаление обрабатывается до каскада, пока связи еще существуют.
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def reset_tag_snapshots(sender, instance, raw=False, created=False,
+                        **kwargs):
+    if not (raw or created):
+        Recipe.objects.filter(tags=instance).update(snapshot=None)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def reset_ingredient_snapshots(sender, instance, raw=False,
+                               created=False, **kwargs):
+    if not (raw or created):
+        Recipe.objects.filter(
+            recipe_ingredients__ingredient=instance
+        ).update(snapshot=None)
+
+
+@receiver(pre_save, sender=User)
+def detect_author_change(sender, instance, raw, update_fields, **kwargs):
+    """instance.author_changed - изменилось ли одно из AUTHOR_FIELDS.
+    Вход (last_login) и смена пароля снимки не трогают; сравнение
+    с базой - один запрос, только если сохраняются поля автора."""
+
+    instance.author_changed = False
+    fields = [
+        field for field in AUTHOR_FIELDS
+        if field != 'id' and (update_fields is None or field in update_fields)
+    ]
+    if raw or instance.pk is None or not fields:
+        return
+    stored = User.objects.filter(pk=instance.pk).values(*fields).first()
+    instance.author_changed = stored is not None and any(
+        stored[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=User)
+def reset_author_snapshots(sender, instance, **kwargs):
+    if getattr(instance, 'author_changed', False):
+        Recipe.objects.filter(author=instance).update(snapshot=None)
+
+
+# Подписки из API пишутся одним запросом в обход сигналов, поэтому
+# представление сбрасывает ленту само. Получателя post_delete нет,
+# чтобы удаление подписки не требовало предварительного SELECT.
+@receiver(post_save, sender=Subscription)
+def invalidate_follower_feed(sender, instance, **kwargs):
+    if settings.FEED_FANOUT:
+        invalidate_feed(instance.follower_id)
+
+
+request_finished.connect(
+    event_buffer.flush_if_due, dispatch_uid='recipes_event_buffer'
+)
@@ -0,0 +1,112 @@
+from .models import Recipe
+
+# Поля автора в снимке; is_subscribed добавляется при ответе.
+AUTHOR_FIELDS = ('id', 'username', 'first_name', 'last_name', 'email')
+
+
+def snapshot_queryset():
+    return Recipe.objects.select_related('author').prefetch_related(
+        'tags', 'recipe_ingredients__ingredient'
+    )
+
+
+def build_snapshot(recipe):
+    """Ответ API по рецепту без признаков текущего пользователя.
+    Картинка хранится относительным URL."""
+
+    return {
+        'id': recipe.id,
+        'name': recipe.name,
+        'image': recipe.image.url if recipe.image else None,
+        'text': recipe.text,
+        'cooking_time': recipe.cooking_time,
+        'author': {
+            field: getattr(recipe.author, field) for field in AUTHOR_FIELDS
+        },
+        'ingredients': [
+            {
+                'id': row.ingredient.id,
+                'name': row.ingredient.name,
+                'measurement_unit': row.ingredient.measurement_unit,
+                'amount': row.amount,
+            } for row in recipe.recipe_ingredients.all()
+        ],
+        'tags': [
+            {
+                'id': tag.id,
+                'name': tag.name,
+                'color': tag.color,
+                'slug': tag.slug,
+            } for tag in recipe.tags.all()
+        ],
+    }
+
+
+def store_snapshot(recipe):
+    """Пересобрать и сохранить снимок одного рецепта одним UPDATE."""
+
+    recipe.snapshot = build_snapshot(recipe)
+    Recipe.objects.filter(pk=recipe.pk).update(snapshot=recipe.snapshot)
+    return recipe.snapshot
+
+
+def build_missing_snapshots(recipes):
+    """id -> снимок для рецептов со сброшенным снимком (изменились тег,
+    ингредиент или автор). Собирается из таблиц одним запросом на
+    таблицу и не сохраняется: чтение не пишет в базу. Сохраняет снимки
+    команда backfill_snapshots."""
+
+    pks = [recipe.pk for recipe in recipes if recipe.snapshot is None]
+    if not pks:
+        return {}
+    return {
+        recipe.pk: build_snapshot(recipe)
+        for recipe in snapshot_queryset().filter(pk__in=pks)
+    }
+
+
+def same_snapshot(stored, actual):
+    """Сравнение без учета порядка ингредиентов и тегов."""
+
+    def canonical(snapshot):
+        if snapshot is None:
+            return None
+        return dict(snapshot, **{
+            key: sorted(snapshot[key], key=lambda item: item['id'])
+            for key in ('ingredients', 'tags')
+        })
+
+    return canonical(stored) == canonical(actual)
+
+
+def refresh_snapshots(queryset, batch_size):
+    """Пересобрать снимки рецептов queryset пакетами. Число рецептов."""
+
+    updated = 0
+    pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(pks), batch_size):
+        recipes = list(snapshot_queryset().filter(
+            pk__in=pks[start:start + batch_size]
+        ))
+        for recipe in recipes:
+            recipe.snapshot = build_snapshot(recipe)
+        Recipe.objects.bulk_update(recipes, ['snapshot'])
+        updated += len(recipes)
+    return updated
+
+
+def check_snapshots(batch_size):
+    """Id рецептов, снимок которых отсутствует или расходится с таблицами."""
+
+    stale = []
+    queryset = snapshot_queryset().order_by('pk')
+    last_pk = 0
+    while True:
+        recipes = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not recipes:
+            return stale
+        stale.extend(
+            recipe.pk for recipe in recipes
+            if not same_snapshot(recipe.snapshot, build_snapshot(recipe))
+        )
+        last_pk = recipes[-1].pk
@@ -0,0 +1,104 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase
+
+from api.middleware import ReplicaStickinessMiddleware
+from foodgram import settings
+from foodgram.db_router import ReplicaRouter, primary_written, use_primary
+from recipes.models import Tag
+
+REPLICA = 'replica1'
+TOKEN = 'Token ' + 'a' * 40
+
+# Вторая база SQLite - зеркало default, как реплика с нулевым отставанием.
+# Раннер тестов создает для нее подключение к тестовой базе default.
+connections.settings.setdefault(REPLICA, {
+    **connections['default'].settings_dict,
+    'TEST': {**connections['default'].settings_dict['TEST'],
+             'MIRROR': 'default'},
+})
+
+
+@mock.patch.object(settings, 'DATABASE_REPLICAS', [REPLICA])
+class ReplicaRouterTests(TransactionTestCase):
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(primary_written.reset, primary_written.set(False))
+        self.addCleanup(use_primary.reset, use_primary.set(False))
+
+    def test_reads_go_to_replica(self):
+        Tag.objects.create(name='Завтрак', color='#FFFF00', slug='breakfast')
+        primary_written.set(False)
+        queryset = Tag.objects.all()
+        self.assertEqual(queryset.db, REPLICA)
+        self.assertEqual(
+            list(queryset.values_list('slug', flat=True)), ['breakfast']
+        )
+
+    def test_writes_go_to_primary(self):
+        tag = Tag.objects.create(name='Обед', color='#00FF00', slug='lunch')
+        self.assertEqual(tag._state.db, 'default')
+        self.assertEqual(ReplicaRouter().db_for_write(Tag), 'default')
+
+    def test_reads_after_write_go_to_primary(self):
+        Tag.objects.create(name='Ужин', color='#0000FF', slug='dinner')
+        self.assertEqual(Tag.objects.all().db, 'default')
+
+    def test_atomic_block_reads_primary(self):
+        with transaction.atomic():
+            self.assertEqual(Tag.objects.all().db, 'default')
+        self.assertEqual(Tag.objects.all().db, REPLICA)
+
+    def test_migrations_only_on_primary(self):
+        router = ReplicaRouter()
+        self.assertTrue(router.allow_migrate('default', 'recipes'))
+        self.assertFalse(router.allow_migrate(REPLICA, 'recipes'))
+
+
+@mock.patch.object(settings, 'DATABASE_REPLICAS', [REPLICA])
+class ReplicaStickinessTests(TransactionTestCase):
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.read_from = None
+
+    def view(self, request):
+        if request.method == 'POST':
+            Tag.objects.create(name='Ужин', color='#0000FF', slug='dinner')
+        self.read_from = Tag.objects.all().db
+        return HttpResponse()
+
+    def request(self, method, token=TOKEN):
+        middleware = ReplicaStickinessMiddleware(self.view)
+        headers = {'HTTP_AUTHORIZATION': token} if token else {}
+        middleware(getattr(self.factory, method)('/api/tags/', **headers))
+        return self.read_from
+
+    def test_unsafe_method_reads_primary(self):
+        self.assertEqual(self.request('post'), 'default')
+
+    def test_reads_primary_within_sticky_window(self):
+        self.request('post')
+        self.assertEqual(self.request('get'), 'default')
+        self.assertEqual(
+            self.request('get', 'Token ' + 'b' * 40), REPLICA
+        )
+        self.assertEqual(self.request('get', token=None), REPLICA)
+
+    def test_reads_replica_after_sticky_window(self):
+        with mock.patch.object(settings, 'REPLICA_STICKY_SECONDS', 1):
+            self.request('post')
+        time.sleep(1.1)
+        self.assertEqual(self.request('get'), REPLICA)
+
+    def test_junk_header_is_not_sticky(self):
+        self.request('post', 'Token junk')
+        self.assertEqual(self.request('get', 'Token junk'), REPLICA)
@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+
+from foodgram import settings
+from recipes.feed import FEED_KEY, cached_feed_ids
+from recipes.models import Recipe
+from users.models import Subscription, User
+
+
+@mock.patch.object(settings, 'FEED_FANOUT', True)
+class FeedFanOutTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(
+            username='author', email='author@example.com',
+            first_name='Анна', last_name='Иванова',
+        )
+        self.reader = User.objects.create(
+            username='reader', email='reader@example.com',
+            first_name='Петр', last_name='Сидоров',
+        )
+        Subscription.objects.create(follower=self.reader, follow=self.author)
+        token = Token.objects.create(user=self.reader)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+
+    def create_recipe(self, name):
+        return Recipe.objects.create(
+            author=self.author, name=name, text='Описание',
+            cooking_time=10, image='recipes/images/recipe.png',
+        )
+
+    def commit_recipe(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.create_recipe(name)
+
+    def feed(self, limit):
+        response = self.client.get('/api/recipes/feed/', {'limit': limit})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_new_recipe_is_added_after_commit(self):
+        first = self.commit_recipe('Первый')
+        cached_feed_ids(self.reader)
+        second = self.commit_recipe('Второй')
+        self.assertEqual(
+            cache.get(FEED_KEY.format(self.reader.id)), [second.id, first.id]
+        )
+
+    def test_rolled_back_recipe_is_not_added(self):
+        first = self.commit_recipe('Первый')
+        cached_feed_ids(self.reader)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                self.create_recipe('Откат')
+                transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(
+            cache.get(FEED_KEY.format(self.reader.id)), [first.id]
+        )
+
+    def test_deleted_recipe_is_removed(self):
+        first = self.commit_recipe('Первый')
+        second = self.commit_recipe('Второй')
+        cached_feed_ids(self.reader)
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(
+            cache.get(FEED_KEY.format(self.reader.id)), [first.id]
+        )
+
+    def test_stale_cache_does_not_cut_feed(self):
+        recipes = [
+            self.commit_recipe(f'Рецепт {number}') for number in range(3)
+        ]
+        cache.set(
+            FEED_KEY.format(self.reader.id),
+            [10 ** 6] + [recipe.id for recipe in reversed(recipes)],
+        )
+        data = self.feed(limit=2)
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNotNone(data['next'])
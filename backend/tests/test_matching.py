@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.test import TestCase
+
+from recipes.matching import ingredient_index
+from recipes.models import Recipe
+from recipes.signals import update_ingredient_index
+
+
+class IngredientIndexHookTests(TestCase):
+
+    def setUp(self):
+        ingredient_index.build([(1, 10)])
+        self.addCleanup(ingredient_index.build, [])
+
+    def change(self, recipe_id, ingredient_ids):
+        update_ingredient_index(
+            sender=Recipe, instance=Recipe(id=recipe_id),
+            ingredient_ids=ingredient_ids,
+        )
+
+    def test_index_updated_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.change(11, [1])
+        self.assertEqual(
+            [row[0] for row in ingredient_index.match([1])[:10]], [11, 10]
+        )
+
+    def test_rollback_leaves_index_unchanged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.change(11, [1])
+                transaction.set_rollback(True)
+        self.assertEqual(
+            [row[0] for row in ingredient_index.match([1])[:10]], [10]
+        )
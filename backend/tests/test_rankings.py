@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from foodgram import settings
+from recipes.models import ActivityEvent
+from recipes.rankings import prune_events
+
+
+class PruneEventsTests(TestCase):
+
+    def test_deletes_only_events_older_than_retention(self):
+        now = timezone.now()
+        retention = timedelta(hours=settings.EVENT_RETENTION_HOURS)
+        ActivityEvent.objects.bulk_create([
+            ActivityEvent(
+                kind=ActivityEvent.FAVORITE_ADD, user_id=1, target_id=1,
+                created=created,
+            ) for created in (
+                now - retention - timedelta(hours=1),
+                now - retention - timedelta(days=30),
+                now - retention + timedelta(hours=1),
+                now,
+            )
+        ])
+        self.assertEqual(prune_events(now, batch_size=1), 2)
+        self.assertEqual(ActivityEvent.objects.count(), 2)
@@ -0,0 +1,108 @@
+import base64
+import io
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from ingredients.models import Ingredient
+from recipes.models import Tag
+from users.models import User
+
+
+def png():
+    image = io.BytesIO()
+    Image.new('RGB', (1, 1)).save(image, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        image.getvalue()
+    ).decode()
+
+
+IMAGE = png()
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RecipeTagsTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create(
+            username='cook', email='cook@example.com',
+            first_name='Иван', last_name='Петров',
+        )
+        token = Token.objects.create(user=user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+        self.ingredient = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+        self.tags = [
+            Tag.objects.create(name='Завтрак', color='#FFFF00',
+                               slug='breakfast'),
+            Tag.objects.create(name='Обед', color='#00FF00', slug='lunch'),
+        ]
+
+    def payload(self, **fields):
+        return {
+            'name': 'Блины', 'text': 'Описание', 'cooking_time': 20,
+            'image': IMAGE,
+            'ingredients': [{'id': self.ingredient.id, 'amount': 200}],
+            **fields,
+        }
+
+    def create_recipe(self):
+        response = self.client.post(
+            '/api/recipes/',
+            self.payload(tags=[tag.id for tag in self.tags]),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def tag_ids(self, response):
+        return [tag['id'] for tag in response.json()['tags']]
+
+    def test_create_without_tags_fails(self):
+        response = self.client.post(
+            '/api/recipes/', self.payload(), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tags', response.json())
+
+    def test_full_update_without_tags_fails(self):
+        pk = self.create_recipe()
+        response = self.client.put(
+            f'/api/recipes/{pk}/', self.payload(),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('tags', response.json())
+
+    def test_partial_update_keeps_tags_and_ingredients(self):
+        pk = self.create_recipe()
+        response = self.client.patch(
+            f'/api/recipes/{pk}/', {'name': 'Оладьи'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.tag_ids(response), [tag.id for tag in self.tags]
+        )
+        self.assertEqual(len(response.json()['ingredients']), 1)
+
+    def test_partial_update_replaces_tags(self):
+        pk = self.create_recipe()
+        response = self.client.patch(
+            f'/api/recipes/{pk}/', {'tags': [self.tags[1].id]},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.tag_ids(response), [self.tags[1].id])
@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from foodgram import settings
+from ingredients.models import Ingredient
+from recipes import related
+from recipes.models import Recipe, RecipeIngredient
+from recipes.signals import recipe_ingredients_changed
+from users.models import User
+
+
+# На трех рецептах любой общий ингредиент встречается чаще RELATED_MAX_DF.
+@mock.patch.object(settings, 'RELATED_MAX_DF', 1.0)
+class UpdateRelatedTests(TestCase):
+
+    def setUp(self):
+        author = User.objects.create(
+            username='cook', email='cook@example.com',
+            first_name='Иван', last_name='Петров',
+        )
+        ingredients = [
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('свекла', 'капуста', 'морковь', 'мука', 'яйцо')
+        ]
+        self.recipes = []
+        for number, used in enumerate((
+            ingredients[:3], ingredients[:2], ingredients[3:],
+        )):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {number}', text='Описание',
+                cooking_time=10, image='recipes/images/recipe.png',
+            )
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                 amount=100)
+                for ingredient in used
+            ])
+            self.recipes.append(recipe)
+
+    def stale_ids(self):
+        return set(Recipe.objects.filter(
+            related_stale=True
+        ).values_list('id', flat=True))
+
+    def test_clears_stale_marks(self):
+        related.update_related(count=2)
+        self.assertEqual(self.stale_ids(), set())
+        self.assertEqual(
+            related.related_ids(Recipe.objects.get(pk=self.recipes[0].pk)),
+            [self.recipes[1].pk],
+        )
+
+    def test_keeps_mark_of_recipe_edited_during_run(self):
+        edited = self.recipes[0]
+        feature_matrix = related.feature_matrix
+
+        def edit_during_run(**kwargs):
+            matrix = feature_matrix(**kwargs)
+            recipe_ingredients_changed.send(
+                sender=Recipe, instance=edited, ingredient_ids=[]
+            )
+            return matrix
+
+        with mock.patch.object(related, 'feature_matrix', edit_during_run):
+            related.update_related(count=2)
+        self.assertEqual(self.stale_ids(), {edited.pk})
+        related.update_related(count=2)
+        self.assertEqual(self.stale_ids(), set())
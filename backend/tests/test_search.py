@@ -0,0 +1,44 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from recipes.models import Recipe
+from users.models import User
+
+
+class RecipeSearchTests(TestCase):
+    """Тестовая база создается миграциями, в том числе 0013, которая на
+    SQLite пересоздает recipes_recipe вместе с триггерами FTS5."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create(
+            username='cook', email='cook@example.com',
+            first_name='Иван', last_name='Петров',
+        )
+
+    def create_recipe(self, name, text='Описание'):
+        return Recipe.objects.create(
+            author=self.author, name=name, text=text, cooking_time=60,
+            image='recipes/images/recipe.png',
+        )
+
+    def search(self, query):
+        response = self.client.get('/api/recipes/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['name'] for recipe in response.json()['results']]
+
+    def test_created_recipe_is_found(self):
+        self.create_recipe('Борщ')
+        self.create_recipe('Оладьи')
+        self.assertEqual(self.search('борщ'), ['Борщ'])
+
+    def test_edited_recipe_is_found_by_new_name(self):
+        recipe = self.create_recipe('Суп')
+        recipe.name = 'Солянка'
+        recipe.save()
+        self.assertEqual(self.search('солянка'), ['Солянка'])
+        self.assertEqual(self.search('суп'), [])
+
+    def test_deleted_recipe_is_not_found(self):
+        self.create_recipe('Борщ').delete()
+        self.assertEqual(self.search('борщ'), [])
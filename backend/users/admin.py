@@ -1,12 +1,14 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
+from foodgram import settings
+from recipes.feed import invalidate_feed
 from .models import Subscription, User
 
 
 class CustomUserAdmin(UserAdmin):
     list_display = ('username', 'is_staff', 'is_superuser', 'is_active')
-    list_filter = ('email', 'username')
+    list_filter = ('is_staff', 'is_superuser', 'is_active')
     fieldsets = (
         (None, {'fields': ('username', 'password')}),
         (
@@ -42,7 +44,35 @@ class CustomUserAdmin(UserAdmin):
     )
     search_fields = ('username', 'first_name', 'last_name', 'email')
     ordering = ['username']
+    show_full_result_count = False
+
+
+class SubscriptionAdmin(admin.ModelAdmin):
+    list_display = ('follower', 'follow')
+    list_select_related = ('follower', 'follow')
+    search_fields = ('follower__username', 'follow__username')
+    autocomplete_fields = ('follower', 'follow')
+    show_full_result_count = False
+
+    # Удаление подписки не вызывает сигнала сброса ленты (см.
+    # recipes.signals), поэтому ленты подписчиков сбрасывает админка.
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        if settings.FEED_FANOUT:
+            invalidate_feed(obj.follower_id)
+
+    def delete_queryset(self, request, queryset):
+        follower_ids = set(queryset.values_list('follower_id', flat=True))
+        super().delete_queryset(request, queryset)
+        if settings.FEED_FANOUT:
+            for follower_id in follower_ids:
+                invalidate_feed(follower_id)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if settings.FEED_FANOUT and change and 'follower' in form.changed_data:
+            invalidate_feed(form.initial['follower'])
 
 
 admin.site.register(User, CustomUserAdmin)
-admin.site.register(Subscription)
+admin.site.register(Subscription, SubscriptionAdmin)
@@ -0,0 +1,52 @@
+from django.db.models import Q
+
+# Поля справочника пользователей с поиском по префиксу.
+DIRECTORY_FIELDS = ('username', 'first_name', 'last_name')
+
+# Индексы под istartswith: в PostgreSQL это UPPER(поле) LIKE 'ABC%',
+# в SQLite - LIKE без учета регистра, который использует индекс NOCASE.
+POSTGRES_DIRECTORY_SQL = tuple(
+    f'CREATE INDEX IF NOT EXISTS users_user_{field}_prefix_idx '
+    f'ON users_user (UPPER({field}) text_pattern_ops)'
+    for field in DIRECTORY_FIELDS
+)
+
+SQLITE_DIRECTORY_SQL = tuple(
+    f'CREATE INDEX IF NOT EXISTS users_user_{field}_prefix_idx '
+    f'ON users_user ({field} COLLATE NOCASE)'
+    for field in DIRECTORY_FIELDS
+)
+
+DIRECTORY_DROP_SQL = tuple(
+    f'DROP INDEX IF EXISTS users_user_{field}_prefix_idx'
+    for field in DIRECTORY_FIELDS
+)
+
+DIRECTORY_SQL = {
+    'postgresql': POSTGRES_DIRECTORY_SQL,
+    'sqlite': SQLITE_DIRECTORY_SQL,
+}
+
+
+def search_users(queryset, query):
+    """Пользователи, у которых username, имя или фамилия
+    начинаются с query (без учета регистра)."""
+
+    query = query.strip()
+    if not query:
+        return queryset
+    condition = Q()
+    for field in DIRECTORY_FIELDS:
+        condition |= Q(**{f'{field}__istartswith': query})
+    return queryset.filter(condition)
+
+
+def create_directory_indexes(apps, schema_editor):
+    for statement in DIRECTORY_SQL.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(statement)
+
+
+def drop_directory_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in DIRECTORY_SQL:
+        for statement in DIRECTORY_DROP_SQL:
+            schema_editor.execute(statement)
@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from users.directory import create_directory_indexes, drop_directory_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_subscription_subscription_unicue_ubscription'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_directory_indexes, drop_directory_indexes),
+    ]